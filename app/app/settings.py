@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     'core',
     'user',
     'recipe',
@@ -47,6 +48,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -109,6 +111,33 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing. PASSWORD_HASHER selects the algorithm for new hashes,
+# the other hashers stay enabled so existing hashes keep verifying.
+# Argon2 additionally needs the argon2-cffi package.
+_PASSWORD_HASHERS = {
+    "pbkdf2": "core.hashers.TunedPBKDF2PasswordHasher",
+    "scrypt": "core.hashers.TunedScryptPasswordHasher",
+    "argon2": "core.hashers.TunedArgon2PasswordHasher",
+}
+PASSWORD_HASHER = os.environ.get("PASSWORD_HASHER", "pbkdf2")
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHERS.items()
+    if name != PASSWORD_HASHER
+]
+
+# Cost parameters of the hashers above, unset values use Django defaults.
+PASSWORD_HASHER_OPTIONS = {
+    "PBKDF2_ITERATIONS": int(os.environ.get("PBKDF2_ITERATIONS", 0)),
+    "SCRYPT_WORK_FACTOR": int(os.environ.get("SCRYPT_WORK_FACTOR", 0)),
+    "SCRYPT_MAXMEM": int(os.environ.get("SCRYPT_MAXMEM", 0)),
+    "ARGON2_TIME_COST": int(os.environ.get("ARGON2_TIME_COST", 0)),
+    "ARGON2_MEMORY_COST": int(os.environ.get("ARGON2_MEMORY_COST", 0)),
+}
+
+# Threads that hash passwords, 0 hashes on the request thread.
+PASSWORD_HASHING_WORKERS = int(os.environ.get("PASSWORD_HASHING_WORKERS", 0))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -130,6 +159,29 @@ MEDIA_URL = "/static/media/"
 MEDIA_ROOT = "/vol/web/media"
 STATIC_ROOT = "/vol/web/static"
 
+# collectstatic writes content hashed copies plus gzip and brotli
+# versions, which WhiteNoise serves with far-future cache headers.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": (
+            "django.contrib.staticfiles.storage.StaticFilesStorage"
+            if DEBUG else
+            "whitenoise.storage.CompressedManifestStaticFilesStorage"
+        ),
+    },
+}
+
+# How core.views.serve_media hands media files out. Empty streams them
+# from Python, "x-accel-redirect" (nginx) and "x-sendfile" leave it to the
+# web server; nginx needs an internal location for the prefix below.
+MEDIA_SERVE_BACKEND = os.environ.get("MEDIA_SERVE_BACKEND", "")
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get(
+    "MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/")
+MEDIA_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -142,6 +194,68 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Default page size of the recipe, tag and ingredient lists. Clients can
+# ask for a different one with the ``page_size`` query parameter.
+RECIPE_API_PAGE_SIZE = int(os.environ.get("RECIPE_API_PAGE_SIZE", 100))
+
+# Default and largest number of suggestions for the tag and ingredient
+# ``q`` typeahead filter.
+TYPEAHEAD_LIMIT = 10
+TYPEAHEAD_MAX_LIMIT = 50
+
+# Default and largest number of recipes returned by the ``similar`` action.
+# Signature matrices of the most recently queried libraries are kept in
+# process, about 512 bytes per recipe.
+RECIPE_SIMILAR_LIMIT = 10
+RECIPE_SIMILAR_MAX_LIMIT = 50
+RECIPE_SIMILARITY_CACHE = {
+    "MAXSIZE": 16,
+    "TTL": 300,
+}
+
+# Default and largest number of recipes returned by the ``cookable``
+# action.
+RECIPE_COOKABLE_LIMIT = 20
+RECIPE_COOKABLE_MAX_LIMIT = 100
+
+# Optional server-side cache of recipe, tag and ingredient list bodies.
+# Entries are keyed by the user's library version, so they never need
+# explicit invalidation.
+RECIPE_API_RESPONSE_CACHE = {
+    "CACHE_ALIAS": os.environ.get("RECIPE_API_RESPONSE_CACHE_ALIAS"),
+    "TIMEOUT": 300,
+}
+
+# Resized copies rendered in the background for every uploaded recipe
+# image, as name: longest side in pixels. WORKERS is the size of the
+# in-process pool, 0 renders inline once the upload is committed.
+RECIPE_IMAGE_VARIANTS = {"thumbnail": 320, "medium": 1024}
+RECIPE_IMAGE_QUALITY = 80
+RECIPE_IMAGE_WORKERS = int(os.environ.get("RECIPE_IMAGE_WORKERS", 2))
+
+# Limits enforced by core.uploads while an image is still being received.
+# Only the first MAX_HEADER_BYTES of an upload are held in memory.
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.environ.get("RECIPE_IMAGE_MAX_BYTES", 10 * 1024 * 1024))
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.environ.get("RECIPE_IMAGE_MAX_PIXELS", 40_000_000))
+RECIPE_IMAGE_MAX_HEADER_BYTES = 256 * 1024
+RECIPE_IMAGE_FORMATS = ["JPEG", "PNG", "WEBP"]
+
+# Store uploads under their content digest so identical images share one
+# immutable file, deleted with the last recipe referencing it.
+RECIPE_IMAGE_CONTENT_ADDRESSED = os.environ.get(
+    "RECIPE_IMAGE_CONTENT_ADDRESSED", "false").lower() == "true"
+
+# Cache of resolved API tokens in the CACHES backend named by CACHE_ALIAS,
+# which every process must share (e.g. Redis or Memcached); tokens are
+# looked up in the database on every request without one. Entries are
+# dropped on changes, TTL only bounds their lifetime.
+TOKEN_AUTH_CACHE = {
+    "TTL": int(os.environ.get("TOKEN_AUTH_CACHE_TTL", 60)),
+    "CACHE_ALIAS": os.environ.get("TOKEN_AUTH_CACHE_ALIAS"),
+}
+
 SPECTACULAR_SETTINGS = {
     "COMPONENT_SPLIT_REQUEST": True,
 }
@@ -0,0 +1,44 @@
+"""
+Production settings for app project.
+
+Select with DJANGO_SETTINGS_MODULE=app.settings_prod. Everything not
+overridden here comes from app.settings.
+"""
+import os
+
+from app.settings import *  # noqa: F401,F403
+from app.settings import DATABASES, STORAGES
+
+DEBUG = False
+
+SECRET_KEY = os.environ["SECRET_KEY"]
+
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.environ.get("ALLOWED_HOSTS", "").split(",")
+    if host.strip()
+]
+
+STORAGES["staticfiles"]["BACKEND"] = \
+    "whitenoise.storage.CompressedManifestStaticFilesStorage"
+
+# Keep database connections open across requests instead of connecting
+# for every one, and check them before reuse so a restarted database or
+# pooler does not surface as an error in the next request. Django
+# recommends turning persistent connections off under ASGI, pgbouncer
+# pools them there.
+asgi = os.environ.get("APP_MODULE", "").startswith("app.asgi")
+DATABASES["default"]["CONN_MAX_AGE"] = int(
+    os.environ.get("DB_CONN_MAX_AGE", 0 if asgi else 60))
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Behind pgbouncer in transaction pooling mode a server connection is
+# only ours for one transaction, so named cursors (iterator() with
+# chunk_size) cannot be kept open. The recipe export pages by id instead.
+if os.environ.get("DB_POOL_MODE") == "transaction":
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+
+MEDIA_SERVE_BACKEND = os.environ.get(
+    "MEDIA_SERVE_BACKEND", "x-accel-redirect")
+
+SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
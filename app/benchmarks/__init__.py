@@ -0,0 +1,51 @@
+"""
+Micro benchmarks for the recipe API.
+
+Run them from the ``app`` directory, e.g.::
+
+    python -m benchmarks.assigned_only
+
+Every benchmark creates a throwaway test database with the configured
+``DATABASES`` settings and drops it again when it finishes.
+"""
+import contextlib
+import os
+import time
+
+import django
+
+
+def setup():
+    """Configure Django for a standalone benchmark script."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+    django.setup()
+
+
+@contextlib.contextmanager
+def test_database():
+    """Run the block against a freshly migrated test database."""
+    from django.db import connection
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def best_of(func, repeat=5):
+    """Return the fastest of ``repeat`` runs of ``func`` in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def report(title, results):
+    """Print ``(label, seconds)`` pairs as a small table."""
+    print(title)
+    for label, seconds in results:
+        print(f"  {label:<40} {seconds * 1000:10.2f} ms")
@@ -0,0 +1,65 @@
+"""
+Compare ways of listing only the tags that are assigned to a recipe.
+
+    python -m benchmarks.assigned_only [tags] [recipes]
+"""
+import sys
+from decimal import Decimal
+
+from benchmarks import setup, test_database, best_of, report
+
+
+def populate(user, tag_count, recipe_count):
+    """Create tags and recipes, linking every other tag to five recipes."""
+    from core.models import Recipe, Tag
+
+    tags = Tag.objects.bulk_create([
+        Tag(user=user, name=f"Tag {i}") for i in range(tag_count)
+    ])
+    recipes = Recipe.objects.bulk_create([
+        Recipe(user=user, title=f"Recipe {i}", time_minutes=10,
+               price=Decimal("1.00"))
+        for i in range(recipe_count)
+    ])
+    Recipe.tags.through.objects.bulk_create([
+        Recipe.tags.through(
+            recipe_id=recipes[(i * 5 + j) % recipe_count].id,
+            tag_id=tag.id,
+        )
+        for i, tag in enumerate(tags[::2])
+        for j in range(5)
+    ], ignore_conflicts=True)
+
+
+def main(tag_count=10000, recipe_count=20000):
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.db.models import Exists, OuterRef
+    from core.models import Recipe, Tag
+
+    with test_database():
+        user = get_user_model().objects.create_user("bench@example.com")
+        populate(user, tag_count, recipe_count)
+        tags = Tag.objects.filter(user=user).order_by("-name")
+
+        def distinct_join():
+            return list(tags.filter(recipe__isnull=False).distinct())
+
+        def exists_subquery():
+            links = Recipe.tags.through.objects.filter(tag_id=OuterRef("id"))
+            return list(tags.filter(Exists(links)))
+
+        assert len(distinct_join()) == len(exists_subquery())
+        report(
+            f"assigned_only with {tag_count} tags, {recipe_count} recipes",
+            [
+                ("DISTINCT over recipe join", best_of(distinct_join)),
+                ("EXISTS subquery (used by the API)",
+                 best_of(exists_subquery)),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
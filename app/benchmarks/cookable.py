@@ -0,0 +1,84 @@
+"""
+Compare ways of ranking recipes against a pantry of ingredients.
+
+    python -m benchmarks.cookable [ingredients] [recipes] [pantry size]
+"""
+import random
+import sys
+from decimal import Decimal
+
+from benchmarks import setup, test_database, best_of, report
+
+
+def populate(user, ingredient_count, recipe_count):
+    """
+    Create ingredients and recipes using three to twelve of them, common
+    ingredients much more often than rare ones.
+    """
+    from core.models import Recipe, Ingredient
+
+    ingredients = Ingredient.objects.bulk_create([
+        Ingredient(user=user, name=f"Ingredient {i}")
+        for i in range(ingredient_count)
+    ])
+    recipes = Recipe.objects.bulk_create([
+        Recipe(user=user, title=f"Recipe {i}", time_minutes=10,
+               price=Decimal("1.00"))
+        for i in range(recipe_count)
+    ], batch_size=5000)
+    weights = [1 / (rank + 1) for rank in range(ingredient_count)]
+    rng = random.Random(0)
+    Recipe.ingredients.through.objects.bulk_create([
+        Recipe.ingredients.through(
+            recipe_id=recipe.id, ingredient_id=ingredient.id)
+        for recipe in recipes
+        for ingredient in set(rng.choices(
+            ingredients, weights, k=rng.randint(3, 12)))
+    ], batch_size=5000)
+    return ingredients
+
+
+def main(ingredient_count=5000, recipe_count=50000, pantry_size=40):
+    setup()
+
+    from django.contrib.auth import get_user_model
+    from django.http import QueryDict
+    from core.models import Recipe
+    from recipe.api.filters import filter_cookable
+
+    with test_database():
+        user = get_user_model().objects.create_user("bench@example.com")
+        ingredients = populate(user, ingredient_count, recipe_count)
+        pantry = {ingredient.id for ingredient in ingredients[:pantry_size]}
+        params = QueryDict(mutable=True)
+        params["have"] = ",".join(str(pk) for pk in pantry)
+
+        def python_loop():
+            ranked = []
+            for recipe in Recipe.objects.filter(user=user).prefetch_related(
+                    "ingredients"):
+                ids = {ingredient.id for ingredient in recipe.ingredients.all()}
+                matched = len(ids & pantry)
+                if matched:
+                    ranked.append((len(ids) - matched, -matched, -recipe.id))
+            return [-key[2] for key in sorted(ranked)[:20]]
+
+        def set_based_query():
+            queryset = filter_cookable(
+                Recipe.objects.filter(user=user), user, params)
+            return list(queryset[:20].values_list("id", flat=True))
+
+        assert python_loop() == set_based_query()
+        report(
+            f"cookable with {ingredient_count} ingredients, {recipe_count} "
+            f"recipes, {pantry_size} in the pantry",
+            [
+                ("Python loop over every recipe", best_of(python_loop, 3)),
+                ("Set based query (used by the API)",
+                 best_of(set_based_query)),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,84 @@
+"""
+Closed loop HTTP load test against a running server, e.g. to compare
+runserver with the production profile::
+
+    python -m benchmarks.load_test http://localhost:8000/api/recipe/recipes/ \\
+        --token <api token> --concurrency 32 --duration 30
+
+Unlike the other benchmarks it does not touch the database itself; point
+it at a server whose user already has some recipes. Each client thread
+keeps one connection open and sends the next request as soon as the
+previous answer arrived.
+"""
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def client(url, headers, deadline, latencies, errors):
+    """Send requests to ``url`` until ``deadline``."""
+    parts = urlsplit(url)
+    connection_class = http.client.HTTPSConnection \
+        if parts.scheme == "https" else http.client.HTTPConnection
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    connection = connection_class(parts.netloc, timeout=30)
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors.append(None)
+            connection.close()
+            continue
+        if response.status >= 400:
+            errors.append(response.status)
+        else:
+            latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Closed loop HTTP load test against a running server.")
+    parser.add_argument("url")
+    parser.add_argument("--token", help="API token of the test user.")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    args = parser.parse_args()
+
+    headers = {"Connection": "keep-alive"}
+    if args.token:
+        headers["Authorization"] = f"Token {args.token}"
+
+    latencies, errors = [], []
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(
+            target=client,
+            args=(args.url, headers, deadline, latencies, errors),
+        )
+        for _ in range(args.concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.url} with {args.concurrency} clients for {elapsed:.1f}s")
+    print(f"  {'requests/s':<20} {len(latencies) / elapsed:10.1f}")
+    print(f"  {'errors':<20} {len(errors):10d}")
+    if len(latencies) >= 2:
+        quantiles = statistics.quantiles(latencies, n=100)
+        for label, index in [("p50", 49), ("p95", 94), ("p99", 98)]:
+            print(f"  {label:<20} {quantiles[index] * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
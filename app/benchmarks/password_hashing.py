@@ -0,0 +1,41 @@
+"""
+Measure password checks (logins) per second per core for each hasher
+with the cost parameters from ``PASSWORD_HASHER_OPTIONS``.
+
+    python -m benchmarks.password_hashing [seconds]
+"""
+import sys
+import time
+
+from benchmarks import setup
+
+
+def checks_per_second(hasher, seconds):
+    """Return how many password checks one thread manages per second."""
+    encoded = hasher.encode("testpass123", hasher.salt())
+    checks = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        hasher.verify("testpass123", encoded)
+        checks += 1
+    return checks / (time.perf_counter() - start)
+
+
+def main(seconds=3.0):
+    setup()
+
+    from django.contrib.auth.hashers import get_hashers
+
+    print("password checks per second on one core")
+    for hasher in get_hashers():
+        try:
+            rate = checks_per_second(hasher, seconds)
+        except ValueError as exc:
+            # Missing optional library such as argon2-cffi.
+            print(f"  {hasher.algorithm:<20} skipped: {exc}")
+            continue
+        print(f"  {hasher.algorithm:<20} {rate:10.1f} logins/s")
+
+
+if __name__ == "__main__":
+    main(*[float(arg) for arg in sys.argv[1:]])
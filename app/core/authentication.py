@@ -0,0 +1,131 @@
+"""
+Authentication classes
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models import DEFERRED
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import (
+    TokenAuthentication, get_authorization_header)
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+
+def _shared_cache():
+    """Return the configured shared cache backend, if any."""
+    alias = settings.TOKEN_AUTH_CACHE["CACHE_ALIAS"]
+    return caches[alias] if alias else None
+
+
+def token_digest(key):
+    """Return the cache key for a token, so raw tokens are never stored."""
+    return "auth-token:" + hashlib.sha256(key.encode()).hexdigest()
+
+
+def invalidate_token(key):
+    """Forget the cached credentials of a token."""
+    shared = _shared_cache()
+    if shared is not None:
+        shared.delete(token_digest(key))
+
+
+def invalidate_user(user):
+    """Forget the cached credentials of every token of ``user``."""
+    shared = _shared_cache()
+    if shared is None:
+        return
+    shared.delete_many([
+        token_digest(key) for key in
+        Token.objects.filter(user=user).values_list("key", flat=True)
+    ])
+
+
+def _partial(model, **values):
+    """
+    Return a ``model`` instance with only ``values`` loaded, the other
+    fields are read from the database on first access.
+    """
+    fields = model._meta.concrete_fields
+    return model.from_db(None, list(values), [
+        values.get(field.attname, DEFERRED) for field in fields
+    ])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that keeps the user id and active flag of
+    resolved tokens in the shared Django cache backend named by
+    ``TOKEN_AUTH_CACHE["CACHE_ALIAS"]``, without one every request looks
+    up its token.
+    Entries are dropped when the user is saved or deleted or the token is
+    deleted, which every process sees through the shared backend.
+    ``request.user`` of a cached token only has its id loaded; other
+    fields cost a query on first access.
+    ``aauthenticate`` does the same for plain async views.
+    """
+
+    def _cached(self, key, entry):
+        """Return the credentials of a cache ``entry`` for token ``key``."""
+        if not entry["is_active"]:
+            raise AuthenticationFailed(_("User inactive or deleted."))
+        user_model = get_user_model()
+        user = _partial(user_model, **{
+            user_model._meta.pk.attname: entry["user_id"],
+            "is_active": True,
+        })
+        return user, _partial(self.get_model(), key=key, user_id=user.pk)
+
+    def _entry(self, token):
+        """Return the cache entry of an authenticated ``token``."""
+        return {"user_id": token.user_id, "is_active": token.user.is_active}
+
+    def authenticate_credentials(self, key):
+        digest = token_digest(key)
+        shared = _shared_cache()
+        if shared is None:
+            return super().authenticate_credentials(key)
+
+        entry = shared.get(digest)
+        if entry is not None:
+            return self._cached(key, entry)
+        user, token = super().authenticate_credentials(key)
+        shared.set(
+            digest, self._entry(token), settings.TOKEN_AUTH_CACHE["TTL"])
+        return user, token
+
+    async def aauthenticate(self, request):
+        """Async version of ``authenticate`` for a Django HttpRequest."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed(_("Invalid token header."))
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise AuthenticationFailed(_("Invalid token header."))
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        """Async version of ``authenticate_credentials``."""
+        digest = token_digest(key)
+        shared = _shared_cache()
+        if shared is not None:
+            entry = await shared.aget(digest)
+            if entry is not None:
+                return self._cached(key, entry)
+
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related("user").aget(key=key)
+        except model.DoesNotExist:
+            raise AuthenticationFailed(_("Invalid token."))
+        if not token.user.is_active:
+            raise AuthenticationFailed(_("User inactive or deleted."))
+        if shared is not None:
+            await shared.aset(
+                digest, self._entry(token), settings.TOKEN_AUTH_CACHE["TTL"])
+        return token.user, token
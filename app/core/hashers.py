@@ -0,0 +1,61 @@
+"""
+Password hashers tuned through settings.
+
+The cost parameters are read from ``settings.PASSWORD_HASHER_OPTIONS`` and
+the expensive hash computations run through :func:`core.hashing.run_hashing`,
+so a burst of signups or logins is bounded to the hashing pool.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher)
+
+from core.hashing import run_hashing
+
+
+def _option(name, default):
+    """Return a hasher option from settings or ``default``."""
+    return settings.PASSWORD_HASHER_OPTIONS.get(name) or default
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with a configurable iteration count."""
+
+    @property
+    def iterations(self):
+        return _option("PBKDF2_ITERATIONS", PBKDF2PasswordHasher.iterations)
+
+    def encode(self, *args, **kwargs):
+        return run_hashing(super().encode, *args, **kwargs)
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """Scrypt with a configurable work factor and memory limit."""
+
+    @property
+    def work_factor(self):
+        return _option("SCRYPT_WORK_FACTOR", ScryptPasswordHasher.work_factor)
+
+    @property
+    def maxmem(self):
+        return _option("SCRYPT_MAXMEM", ScryptPasswordHasher.maxmem)
+
+    def encode(self, *args, **kwargs):
+        return run_hashing(super().encode, *args, **kwargs)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with configurable time and memory cost."""
+
+    @property
+    def time_cost(self):
+        return _option("ARGON2_TIME_COST", Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return _option("ARGON2_MEMORY_COST", Argon2PasswordHasher.memory_cost)
+
+    def encode(self, *args, **kwargs):
+        return run_hashing(super().encode, *args, **kwargs)
+
+    def verify(self, *args, **kwargs):
+        return run_hashing(super().verify, *args, **kwargs)
@@ -0,0 +1,25 @@
+"""
+Bounded thread pool for CPU heavy password hashing.
+
+hashlib's PBKDF2 and scrypt as well as argon2-cffi release the GIL while
+hashing, so running them on a small pool caps how many cores a login
+burst can take while other request threads keep serving the API.
+"""
+from django.conf import settings
+
+from core.pools import ResizablePool
+
+
+_pool = ResizablePool("password-hashing")
+
+
+def run_hashing(func, *args, **kwargs):
+    """
+    Run ``func`` on the hashing pool and wait for its result.
+    Runs inline when ``PASSWORD_HASHING_WORKERS`` is 0 or when already
+    called from a pool thread.
+    """
+    size = settings.PASSWORD_HASHING_WORKERS
+    if not size or _pool.in_worker():
+        return func(*args, **kwargs)
+    return _pool.get(size).submit(func, *args, **kwargs).result()
@@ -0,0 +1,188 @@
+"""
+Background rendering of resized recipe image variants.
+
+Uploads are stored as-is and answered straight away. The variants are
+rendered after the transaction commits on a small in-process thread pool,
+so no broker is needed, and written next to the original through the
+default storage. Pillow releases the GIL while resizing and encoding.
+
+With ``RECIPE_IMAGE_CONTENT_ADDRESSED`` uploads are stored once per
+distinct content under their sha256 digest and reference counted through
+ImageBlob, so the same photo is kept (and rendered) only once.
+"""
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from PIL import Image, ImageOps, features
+
+from core.models import Recipe, LibraryVersion, ImageBlob
+from core.pools import ResizablePool
+
+
+logger = logging.getLogger(__name__)
+
+_pool = ResizablePool("recipe-images")
+
+
+def variant_name(name, variant, file_format):
+    """
+    Return the storage name of ``variant`` of the image ``name``. Its size
+    and quality are part of the name, so a name always stands for the same
+    rendering and media responses can be cached as immutable.
+    """
+    root = os.path.splitext(name)[0]
+    ext = "webp" if file_format == "WEBP" else "jpg"
+    size = settings.RECIPE_IMAGE_VARIANTS[variant]
+    quality = settings.RECIPE_IMAGE_QUALITY
+    return f"{root}_{variant}_{size}q{quality}.{ext}"
+
+
+def _variant_format():
+    """Return the format variants are written in."""
+    return "WEBP" if features.check("webp") else "JPEG"
+
+
+def blob_name(digest, filename):
+    """Return the storage name of the content-addressed blob ``digest``."""
+    ext = os.path.splitext(filename)[1].lower()
+    return os.path.join("uploads", "recipe", "blobs", digest[:2],
+                        f"{digest}{ext}")
+
+
+def store_image(file):
+    """
+    Store an upload checked by CappedImageUploadHandler under its digest,
+    writing it only if no recipe uses the same content yet. Must run in
+    the transaction that assigns the returned name to a recipe.
+    """
+    name, created = ImageBlob.objects.acquire(
+        file.content_digest, blob_name(file.content_digest, file.name))
+    if created or not default_storage.exists(name):
+        stored = default_storage.save(name, file)
+        if stored != name:
+            # The file of a just released blob with the same content is
+            # still there, awaiting its delete on commit, so the storage
+            # picked another name. Point everything at the new file.
+            ImageBlob.objects.filter(digest=file.content_digest).update(
+                name=stored)
+            Recipe.objects.filter(image=name).update(image=stored)
+            name = stored
+    return name
+
+
+def image_files(name, variants=()):
+    """Return the storage names of the image ``name`` and its variants."""
+    return {name, *variants, *(
+        variant_name(name, variant, _variant_format())
+        for variant in settings.RECIPE_IMAGE_VARIANTS
+    )}
+
+
+def release_image(name, variants=()):
+    """
+    Drop a recipe's reference to the image ``name`` and, once the
+    transaction commits, delete it and its ``variants`` unless another
+    recipe or blob still uses it. Shared blobs are only deleted with
+    their last reference.
+    """
+    if ImageBlob.objects.release(name) is False:
+        return
+    variants = list(variants)
+
+    def delete():
+        # The same content may have been uploaded again in the meantime.
+        if ImageBlob.objects.filter(name=name).exists() or \
+                Recipe.objects.filter(image=name).exists():
+            return
+        for file_name in image_files(name, variants):
+            default_storage.delete(file_name)
+
+    transaction.on_commit(delete)
+
+
+def render_variants(recipe_id, name):
+    """
+    Render every configured variant of the image ``name`` and record them
+    on the recipe, unless its image was replaced in the meantime.
+    Variants already rendered for another recipe sharing the same blob are
+    reused.
+    """
+    rendered = Recipe.objects.filter(image=name).exclude(
+        image_variants={}).values_list("image_variants", flat=True).first()
+    if rendered and set(rendered) == set(settings.RECIPE_IMAGE_VARIANTS):
+        return _record_variants(recipe_id, name, rendered)
+
+    file_format = _variant_format()
+    variants, missing = {}, []
+    for variant in settings.RECIPE_IMAGE_VARIANTS:
+        path = variant_name(name, variant, file_format)
+        # The same name is the same rendering, written by an earlier run.
+        if default_storage.exists(path):
+            variants[variant] = path
+        else:
+            missing.append(variant)
+    if not missing:
+        return _record_variants(recipe_id, name, variants)
+
+    with default_storage.open(name) as f:
+        with Image.open(f) as original:
+            # Apply the EXIF orientation before dropping the metadata.
+            image = ImageOps.exif_transpose(original).convert("RGB")
+
+    for variant in missing:
+        size = settings.RECIPE_IMAGE_VARIANTS[variant]
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        # Nothing but the pixels is passed on, so EXIF, ICC profiles and
+        # comments from the upload are not written to the variants.
+        resized.save(
+            buffer, file_format, quality=settings.RECIPE_IMAGE_QUALITY)
+        variants[variant] = default_storage.save(
+            variant_name(name, variant, file_format),
+            ContentFile(buffer.getvalue()))
+    return _record_variants(recipe_id, name, variants)
+
+
+def _record_variants(recipe_id, name, variants):
+    """Store ``variants`` on the recipe if it still shows ``name``."""
+    updated = Recipe.objects.filter(id=recipe_id, image=name).update(
+        image_variants=variants)
+    if updated:
+        LibraryVersion.objects.bump(
+            get_user_model().objects.get(recipe__id=recipe_id))
+    return variants
+
+
+def _process(recipe_id, name):
+    """Pool entry point, logs failures instead of losing them."""
+    try:
+        render_variants(recipe_id, name)
+    except Exception:
+        logger.exception("Rendering variants of %s failed.", name)
+    finally:
+        if _pool.in_worker():
+            connection.close()
+
+
+def schedule_variants(recipe):
+    """
+    Render the variants of ``recipe.image`` once the current transaction
+    commits. Runs inline when ``RECIPE_IMAGE_WORKERS`` is 0.
+    """
+    recipe_id, name = recipe.id, recipe.image.name
+
+    def submit():
+        size = settings.RECIPE_IMAGE_WORKERS
+        if not size:
+            _process(recipe_id, name)
+        else:
+            _pool.get(size).submit(_process, recipe_id, name)
+
+    transaction.on_commit(submit)
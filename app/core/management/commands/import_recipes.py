@@ -0,0 +1,268 @@
+"""
+Django command to import recipes from an NDJSON or CSV dump.
+"""
+import csv
+import io
+import json
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework import serializers
+
+from core.models import Recipe, Tag, Ingredient, LibraryVersion
+from core.similarity import signature
+from recipe.api.serializers import IngredientSerializer, TagSerializer
+
+
+RECIPE_FIELDS = ["title", "description", "time_minutes", "price", "link"]
+
+
+# Yielded by Command._rows for lines that are not valid JSON.
+INVALID_ROW = object()
+
+
+def _names(value):
+    """Return tag/ingredient names from a list or a "|" separated string."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [name for name in value.split("|") if name]
+    if not isinstance(value, list):
+        raise serializers.ValidationError(
+            "Expected a list of names or a | separated string.")
+    return [
+        item.get("name") if isinstance(item, dict) else item
+        for item in value
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Import recipes from an NDJSON or CSV file in the format written "
+        "by the recipe export endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, - for stdin.")
+        parser.add_argument(
+            "--format", dest="file_format", choices=["ndjson", "csv"],
+            help="Input format, guessed from the file extension by default.",
+        )
+        parser.add_argument(
+            "--user",
+            help="Email of the owner for rows without a 'user' column.",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--copy", action="store_true",
+            help="Write rows with PostgreSQL COPY instead of INSERT.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Entry point for command.
+        """
+        if options["copy"] and connection.vendor != "postgresql":
+            raise CommandError("--copy is only supported on PostgreSQL.")
+        self.use_copy = options["copy"]
+        self.default_email = options["user"]
+        self.users = {}
+        # Names are checked like the API checks nested tags and ingredients.
+        self.name_fields = {
+            "tags": TagSerializer().fields["name"],
+            "ingredients": IngredientSerializer().fields["name"],
+        }
+
+        file_format = options["file_format"] or (
+            "csv" if options["path"].endswith(".csv") else "ndjson")
+        if options["path"] == "-":
+            self._import(sys.stdin, file_format, options["batch_size"])
+        else:
+            with open(options["path"], newline="", encoding="utf-8") as f:
+                self._import(f, file_format, options["batch_size"])
+
+    def _rows(self, stream, file_format):
+        """Yield ``(line number, dict)`` for every row of the input."""
+        if file_format == "csv":
+            for number, row in enumerate(csv.DictReader(stream), start=2):
+                yield number, row
+        else:
+            for number, line in enumerate(stream, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield number, json.loads(line)
+                except json.JSONDecodeError as exc:
+                    self.stderr.write(f"Line {number}: invalid JSON, {exc}.")
+                    yield number, INVALID_ROW
+
+    def _import(self, stream, file_format, batch_size):
+        """Read the input in batches and write each one."""
+        start = time.perf_counter()
+        imported = skipped = 0
+        batch = []
+        for number, row in self._rows(stream, file_format):
+            recipe = self._parse(number, row)
+            if recipe is None:
+                skipped += 1
+                continue
+            batch.append(recipe)
+            if len(batch) >= batch_size:
+                imported += self._write(batch)
+                batch = []
+                self._progress(imported, start)
+        if batch:
+            imported += self._write(batch)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} recipes in {elapsed:.1f}s "
+            f"({imported / max(elapsed, 1e-9):.0f} rows/s), "
+            f"skipped {skipped}."
+        ))
+
+    def _progress(self, imported, start):
+        """Report throughput so far."""
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{imported} recipes ({imported / max(elapsed, 1e-9):.0f} rows/s)")
+
+    def _user(self, email):
+        """Return the user with ``email``, cached per run."""
+        if email not in self.users:
+            self.users[email] = get_user_model().objects.filter(
+                email=email).first()
+        return self.users[email]
+
+    def _parse(self, number, row):
+        """
+        Return ``(recipe, tag names, ingredient names)`` for a row, or None
+        when it is invalid.
+        """
+        if row is INVALID_ROW:
+            return None
+        if not isinstance(row, dict):
+            self.stderr.write(f"Line {number}: expected a JSON object.")
+            return None
+
+        email = row.get("user") or self.default_email
+        user = self._user(email) if email else None
+        if user is None:
+            self.stderr.write(f"Line {number}: unknown user {email!r}.")
+            return None
+
+        recipe = Recipe(user=user, **{
+            field: row[field] for field in RECIPE_FIELDS
+            if row.get(field) not in (None, "")
+        })
+        try:
+            recipe.clean_fields(exclude=["user", "image"])
+        except ValidationError as exc:
+            self.stderr.write(f"Line {number}: {exc.message_dict}")
+            return None
+
+        names = {}
+        for field_name, name_field in self.name_fields.items():
+            try:
+                names[field_name] = [
+                    name_field.run_validation(name)
+                    for name in _names(row.get(field_name))
+                ]
+            except serializers.ValidationError as exc:
+                errors = {field_name: [str(error) for error in exc.detail]}
+                self.stderr.write(f"Line {number}: {errors}")
+                return None
+        return recipe, names["tags"], names["ingredients"]
+
+    def _write(self, batch):
+        """Write one batch of parsed rows in a single transaction."""
+        with transaction.atomic():
+            users = {recipe.user_id: recipe.user for recipe, _, _ in batch}
+            related = {"tags": {}, "ingredients": {}}
+            for user_id, user in users.items():
+                rows = [row for row in batch if row[0].user_id == user_id]
+                for index, (field_name, model) in enumerate(
+                        [("tags", Tag), ("ingredients", Ingredient)],
+                        start=1):
+                    names = [name for row in rows for name in row[index]]
+                    for obj in model.objects.get_or_create_many(user, names):
+                        related[field_name][user_id, obj.name] = obj.id
+
+            recipes = []
+            for recipe, tags, ingredients in batch:
+                recipe.similarity_signature = signature(
+                    [related["tags"][recipe.user_id, name] for name in tags],
+                    [related["ingredients"][recipe.user_id, name]
+                     for name in ingredients],
+                )
+                recipes.append(recipe)
+            if self.use_copy:
+                self._copy_recipes(recipes)
+            else:
+                Recipe.objects.bulk_create(recipes)
+
+            links = {"tags": [], "ingredients": []}
+            for recipe, tags, ingredients in batch:
+                for field_name, names in [("tags", tags),
+                                          ("ingredients", ingredients)]:
+                    links[field_name] += [
+                        (recipe.id, related[field_name][recipe.user_id, name])
+                        for name in names
+                    ]
+            for field_name, pairs in links.items():
+                if self.use_copy:
+                    self._copy_links(field_name, pairs)
+                else:
+                    Recipe.objects.add_related(field_name, pairs)
+
+            for user in users.values():
+                LibraryVersion.objects.bump(user)
+        return len(batch)
+
+    def _copy(self, table, columns, rows):
+        """Stream ``rows`` into ``table`` with COPY."""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            # csv.writer leaves empty strings unquoted, which COPY would
+            # read as NULL without an explicit marker.
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) "
+                "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+
+    def _copy_recipes(self, recipes):
+        """COPY recipes after reserving their ids from the sequence."""
+        table = Recipe._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) "
+                "FROM generate_series(1, %s)",
+                [table, len(recipes)],
+            )
+            for recipe, (recipe_id,) in zip(recipes, cursor.fetchall()):
+                recipe.id = recipe_id
+
+        columns = ["id", "user_id"] + RECIPE_FIELDS + [
+            "image", "image_variants", "similarity_signature"]
+        self._copy(table, columns, [
+            [recipe.id, recipe.user_id] + [
+                getattr(recipe, field) for field in RECIPE_FIELDS
+            ] + ["", "{}", "\\x" + recipe.similarity_signature.hex()]
+            for recipe in recipes
+        ])
+
+    def _copy_links(self, field_name, pairs):
+        """COPY through rows, dropping duplicates first."""
+        field = Recipe._meta.get_field(field_name)
+        self._copy(
+            field.remote_field.through._meta.db_table,
+            [field.m2m_column_name(), field.m2m_reverse_name()],
+            sorted(set(pairs)),
+        )
@@ -0,0 +1,159 @@
+"""
+Django command to delete recipe images no recipe refers to anymore.
+"""
+import datetime
+import functools
+import operator
+import os
+import re
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Recipe, ImageBlob
+
+
+ROOT = "uploads/recipe"
+CURSOR_NAME = ".sweep_media_cursor"
+
+
+def _parts(name):
+    """Split a storage name into the components it is walked by."""
+    return tuple(name.split("/"))
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete files under MEDIA_ROOT/uploads/recipe that no recipe uses. "
+        "Each run checks at most --limit files and resumes where the "
+        "previous run stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10000)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--min-age", type=int, default=3600,
+            help="Keep files younger than this many seconds, they may "
+                 "belong to an upload that is not committed yet.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument(
+            "--reset", action="store_true",
+            help="Start from the beginning instead of the saved cursor.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Entry point for command.
+        """
+        variants = "|".join(
+            re.escape(name) for name in settings.RECIPE_IMAGE_VARIANTS)
+        # Variant names carry their size and quality, see
+        # core.images.variant_name; older ones do not.
+        self.variant_re = re.compile(
+            rf"^(.+)_(?:{variants})(?:_\d+q\d+)?\.(?:webp|jpg)$")
+        self.cutoff = timezone.now() - datetime.timedelta(
+            seconds=options["min_age"])
+        self.dry_run = options["dry_run"]
+
+        cursor = None if options["reset"] else self._read_cursor()
+        scanned = deleted = 0
+        batch = []
+        files = self._walk(ROOT, _parts(cursor) if cursor else ())
+        for name in files:
+            batch.append(name)
+            scanned += 1
+            if len(batch) >= options["batch_size"]:
+                deleted += self._sweep(batch)
+                batch = []
+            if scanned >= options["limit"]:
+                break
+        else:
+            # The whole tree was walked, start over next time.
+            files = None
+        if batch:
+            deleted += self._sweep(batch)
+
+        if files is None:
+            self._write_cursor(None)
+        elif scanned:
+            self._write_cursor(name)
+
+        action = "Would delete" if self.dry_run else "Deleted"
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {scanned} files. {action} {deleted}."))
+
+    def _walk(self, path, cursor):
+        """Yield the files under ``path`` in order, after ``cursor``."""
+        try:
+            dirs, files = default_storage.listdir(path)
+        except FileNotFoundError:
+            return
+        entries = sorted(
+            [(name, True) for name in dirs] + [(name, False) for name in files])
+        for name, is_dir in entries:
+            full = f"{path}/{name}"
+            parts = _parts(full)
+            if is_dir:
+                # Skip directories the cursor has already moved past
+                # without listing them.
+                if parts >= cursor[:len(parts)]:
+                    yield from self._walk(full, cursor)
+            elif parts > cursor:
+                yield full
+
+    def _sweep(self, names):
+        """Delete the unused files among ``names``, return how many."""
+        live = set(Recipe.objects.filter(
+            image__in=names).values_list("image", flat=True))
+        live.update(ImageBlob.objects.filter(
+            name__in=names).values_list("name", flat=True))
+
+        # Variants are live as long as their original is.
+        roots = {
+            match.group(1) for match in map(self.variant_re.match, names)
+            if match
+        }
+        live_roots = set()
+        if roots:
+            # Prefix lookups, served on PostgreSQL by the pattern ops index
+            # Django adds next to the one on Recipe.image.
+            originals = functools.reduce(operator.or_, [
+                Q(image__startswith=f"{root}.") for root in roots])
+            live_roots = {
+                os.path.splitext(image)[0] for image in
+                Recipe.objects.filter(originals).values_list(
+                    "image", flat=True)
+            }
+
+        deleted = 0
+        for name in names:
+            match = self.variant_re.match(name)
+            if name in live or (match and match.group(1) in live_roots):
+                continue
+            if default_storage.get_modified_time(name) > self.cutoff:
+                continue
+            if not self.dry_run:
+                default_storage.delete(name)
+            deleted += 1
+        return deleted
+
+    def _read_cursor(self):
+        """Return the last file checked by the previous run, if any."""
+        if not default_storage.exists(CURSOR_NAME):
+            return None
+        with default_storage.open(CURSOR_NAME) as f:
+            return f.read().decode().strip() or None
+
+    def _write_cursor(self, name):
+        """Remember ``name`` as the place to resume from."""
+        if self.dry_run:
+            return
+        default_storage.delete(CURSOR_NAME)
+        if name is not None:
+            default_storage.save(CURSOR_NAME, ContentFile(name.encode()))
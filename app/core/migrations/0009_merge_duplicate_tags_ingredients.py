@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:23
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicates(apps, schema_editor):
+    """Fold duplicate (user, name) tags and ingredients into the oldest."""
+    Recipe = apps.get_model("core", "Recipe")
+    for model_name, field_name in [("Tag", "tags"),
+                                   ("Ingredient", "ingredients")]:
+        model = apps.get_model("core", model_name)
+        through = getattr(Recipe, field_name).through
+        column = f"{model_name.lower()}_id"
+        duplicates = (
+            model.objects.values("user", "name")
+            .annotate(keep_id=Min("id"), total=Count("id"))
+            .filter(total__gt=1)
+        )
+        for duplicate in duplicates:
+            keep_id = duplicate["keep_id"]
+            drop_ids = list(
+                model.objects.filter(
+                    user=duplicate["user"], name=duplicate["name"],
+                ).exclude(id=keep_id).values_list("id", flat=True)
+            )
+            for drop_id in drop_ids:
+                rows = through.objects.filter(**{column: drop_id})
+                rows.filter(recipe_id__in=through.objects.filter(
+                    **{column: keep_id}).values("recipe_id")).delete()
+                rows.update(**{column: keep_id})
+            model.objects.filter(id__in=drop_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_recipe_tag_ingredient_user_indexes'),
+    ]
+
+    # Kept apart from the constraints of 0010_unique_tag_ingredient_user_name:
+    # PostgreSQL refuses to ALTER a table with pending deferred FK checks
+    # from these updates and deletes in the same transaction.
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index the recipe M2M tables from the tag/ingredient side, so filtering
+    recipes by tag or ingredient ids is an index-only scan.
+    """
+
+    dependencies = [
+        ('core', '0010_unique_tag_ingredient_user_name'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX core_recipe_tags_tag_recipe_idx "
+            "ON core_recipe_tags (tag_id, recipe_id);",
+            "DROP INDEX core_recipe_tags_tag_recipe_idx;",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX core_recipe_ingredients_ingredient_recipe_idx "
+            "ON core_recipe_ingredients (ingredient_id, recipe_id);",
+            "DROP INDEX core_recipe_ingredients_ingredient_recipe_idx;",
+        ),
+    ]
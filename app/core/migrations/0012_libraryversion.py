@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def create_versions(apps, schema_editor):
+    """Give every existing user a library version row."""
+    User = apps.get_model("core", "User")
+    LibraryVersion = apps.get_model("core", "LibraryVersion")
+    LibraryVersion.objects.bulk_create([
+        LibraryVersion(user_id=user_id)
+        for user_id in User.objects.values_list("id", flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_recipe_m2m_reverse_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LibraryVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('modified_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
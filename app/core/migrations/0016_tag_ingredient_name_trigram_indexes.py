@@ -0,0 +1,43 @@
+from django.contrib.postgres.operations import (
+    BtreeGinExtension, TrigramExtension)
+from django.db import migrations
+
+
+# Matches the UPPER(name::text) Django generates for istartswith and the
+# Upper("name") trigram lookups of recipe.api.filters.filter_typeahead.
+TABLES = ["core_tag", "core_ingredient"]
+
+
+def create_indexes(apps, schema_editor):
+    """Index per-user name lookups by trigram on PostgreSQL only."""
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table in TABLES:
+        schema_editor.execute(
+            f"CREATE INDEX {table}_user_name_trgm_idx ON {table} "
+            "USING gin (user_id, upper(name::text) gin_trgm_ops);"
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for table in TABLES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {table}_user_name_trgm_idx;")
+
+
+class Migration(migrations.Migration):
+    """
+    Trigram index tag and ingredient names for typeahead, next to the user
+    id (through btree_gin) so one index serves a single user's names.
+    """
+
+    dependencies = [
+        ('core', '0015_recipe_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        BtreeGinExtension(),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_recipe_time_price_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='similarity_signature',
+            field=models.BinaryField(null=True),
+        ),
+    ]
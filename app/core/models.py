@@ -2,7 +2,9 @@
 Database Models
 """
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser, BaseUserManager, PermissionsMixin)
 import uuid
@@ -39,6 +41,32 @@ class UserManager(BaseUserManager):
         return user
 
 
+class RecipeAttrManager(models.Manager):
+    """Manager for per-user recipe attributes (tags, ingredients)."""
+
+    def get_or_create_many(self, user, names):
+        """
+        Return objects for ``names`` owned by ``user`` in the given order,
+        creating the missing ones with a single bulk insert.
+        """
+        names = list(dict.fromkeys(names))
+        existing = {
+            obj.name: obj
+            for obj in self.filter(user=user, name__in=names)
+        }
+        missing = [name for name in names if name not in existing]
+        if missing:
+            # Rows inserted concurrently by another request are skipped
+            # by the (user, name) constraint and picked up by the re-read.
+            self.bulk_create(
+                [self.model(user=user, name=name) for name in missing],
+                ignore_conflicts=True,
+            )
+            for obj in self.filter(user=user, name__in=missing):
+                existing[obj.name] = obj
+        return [existing[name] for name in names]
+
+
 class User(AbstractBaseUser, PermissionsMixin):
     """
     User Model.
@@ -52,6 +80,60 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
 
 
+class RecipeManager(models.Manager):
+    """Manager for recipes."""
+
+    def get_queryset(self):
+        # The search vector and similarity signature are only read by
+        # dedicated queries, don't ship them to Python with every recipe.
+        return super().get_queryset().defer(
+            "search_vector", "similarity_signature")
+
+    def _through(self, field_name):
+        """Return the M2M field and its through model for ``field_name``."""
+        field = self.model._meta.get_field(field_name)
+        return field, field.remote_field.through
+
+    def add_related(self, field_name, links):
+        """Insert ``(recipe_id, related_id)`` through rows in one query."""
+        field, through = self._through(field_name)
+        through.objects.bulk_create([
+            through(**{
+                field.m2m_column_name(): recipe_id,
+                field.m2m_reverse_name(): related_id,
+            })
+            for recipe_id, related_id in links
+        ], ignore_conflicts=True)
+
+    def set_related(self, field_name, wanted):
+        """
+        Make ``wanted`` (recipe id -> list of related ids) the related ids
+        of each recipe, deleting and inserting only the rows that change.
+        """
+        field, through = self._through(field_name)
+        rows = through.objects.filter(**{
+            f"{field.m2m_column_name()}__in": list(wanted),
+        }).values_list(
+            "id", field.m2m_column_name(), field.m2m_reverse_name())
+
+        current = {recipe_id: set() for recipe_id in wanted}
+        stale = []
+        for row_id, recipe_id, related_id in rows:
+            if related_id in wanted[recipe_id]:
+                current[recipe_id].add(related_id)
+            else:
+                stale.append(row_id)
+
+        if stale:
+            through.objects.filter(id__in=stale).delete()
+        self.add_related(field_name, [
+            (recipe_id, related_id)
+            for recipe_id, related_ids in wanted.items()
+            for related_id in related_ids
+            if related_id not in current[recipe_id]
+        ])
+
+
 class Recipe(models.Model):
     """Recipe object."""
     user = models.ForeignKey(
@@ -65,7 +147,28 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag')
     ingredients = models.ManyToManyField('Ingredient')
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    # Looked up by name on every upload and delete and by the sweeper.
+    image = models.ImageField(
+        null=True, db_index=True, upload_to=recipe_image_file_path)
+    # Storage names of the resized copies of ``image`` by variant, filled
+    # in by core.images once they are rendered.
+    image_variants = models.JSONField(default=dict, blank=True)
+    # Weighted title and description lexemes, kept up to date by a
+    # PostgreSQL trigger (see migration 0015) and GIN indexed.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # MinHash of the tag and ingredient ids, see core.similarity. Null
+    # until computed, empty for recipes with neither.
+    similarity_signature = models.BinaryField(null=True)
+    objects = RecipeManager()
+
+    class Meta:
+        indexes = [
+            # Backs the per-user "-id" keyset pagination.
+            models.Index(fields=["user", "id"]),
+            # Range filters and ordering on time and price, id breaks ties.
+            models.Index(fields=["user", "time_minutes", "id"]),
+            models.Index(fields=["user", "price", "id"]),
+        ]
 
     def __str__(self):
         return self.title
@@ -78,6 +181,16 @@ class Tag(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    objects = RecipeAttrManager()
+
+    class Meta:
+        constraints = [
+            # Also serves (user, name) lookups and the "-name" ordering.
+            models.UniqueConstraint(
+                fields=["user", "name"],
+                name="unique_%(class)s_user_name",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -90,6 +203,110 @@ class Ingredient(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    objects = RecipeAttrManager()
+
+    class Meta:
+        constraints = [
+            # Also serves (user, name) lookups and the "-name" ordering.
+            models.UniqueConstraint(
+                fields=["user", "name"],
+                name="unique_%(class)s_user_name",
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class LibraryVersionManager(models.Manager):
+    """Manager for per-user library versions."""
+
+    def current(self, user):
+        """Return ``(version, modified_at)`` of the user's library."""
+        row = self.filter(user=user).values_list(
+            "version", "modified_at").first()
+        return row or (0, None)
+
+    async def acurrent(self, user):
+        """Async version of ``current``."""
+        row = await self.filter(user=user).values_list(
+            "version", "modified_at").afirst()
+        return row or (0, None)
+
+    def bump(self, user):
+        """Record a change to the user's recipes, tags or ingredients."""
+        changes = {
+            "version": models.F("version") + 1,
+            "modified_at": timezone.now(),
+        }
+        if not self.filter(user=user).update(**changes):
+            _, created = self.get_or_create(
+                user=user, defaults={"version": 1})
+            if not created:
+                self.filter(user=user).update(**changes)
+
+
+class LibraryVersion(models.Model):
+    """
+    Counter bumped on every API write to a user's recipes, tags or
+    ingredients. Lets read endpoints answer conditional requests without
+    touching the recipe tables.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    modified_at = models.DateTimeField(default=timezone.now)
+    objects = LibraryVersionManager()
+
+    def __str__(self):
+        return f"{self.user_id}@{self.version}"
+
+
+class ImageBlobManager(models.Manager):
+    """Manager for reference counted image blobs."""
+
+    def acquire(self, digest, name):
+        """
+        Add a reference to the blob ``digest``, creating it with ``name``
+        when it is new. Return ``(blob name, created)``.
+        """
+        if self.filter(digest=digest).update(
+                refcount=models.F("refcount") + 1):
+            return self.filter(digest=digest).values_list(
+                "name", flat=True).get(), False
+        blob, created = self.get_or_create(
+            digest=digest, defaults={"name": name, "refcount": 1})
+        if not created:
+            self.filter(digest=digest).update(
+                refcount=models.F("refcount") + 1)
+        return blob.name, created
+
+    def release(self, name):
+        """
+        Drop a reference to the blob stored as ``name``. Return True when
+        it was the last one and the blob row was deleted, None when no blob
+        is stored as ``name``.
+        """
+        if not self.filter(name=name, refcount__gt=0).update(
+                refcount=models.F("refcount") - 1):
+            return None
+        deleted, _ = self.filter(name=name, refcount=0).delete()
+        return bool(deleted)
+
+
+class ImageBlob(models.Model):
+    """
+    Uploaded image stored once under its sha256 digest and shared by every
+    recipe that uses the same content.
+    """
+    digest = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255, unique=True)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    objects = ImageBlobManager()
 
     def __str__(self):
         return self.name
@@ -0,0 +1,33 @@
+"""
+In-process thread pools
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ResizablePool:
+    """
+    Lazily created thread pool whose threads are named after ``name``,
+    recreated when the requested size changes (e.g. under override_settings).
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._executor = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, size):
+        """Return the pool, recreating it when its size changed."""
+        with self._lock:
+            if self._executor is None or self._size != size:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                self._executor = ThreadPoolExecutor(
+                    max_workers=size, thread_name_prefix=self.name)
+                self._size = size
+            return self._executor
+
+    def in_worker(self):
+        """Return whether the calling thread belongs to this pool."""
+        return threading.current_thread().name.startswith(self.name)
@@ -0,0 +1,38 @@
+"""
+Signal handlers for core models
+"""
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.authentication import invalidate_token, invalidate_user
+from core.images import release_image
+from core.models import LibraryVersion, Recipe
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drop cached credentials when a user changes or is deactivated."""
+    invalidate_user(instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_library_version(sender, instance, created, **kwargs):
+    """Start every new user's library at version 0."""
+    if created:
+        LibraryVersion.objects.create(user=instance)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """Drop cached credentials of a deleted token."""
+    invalidate_token(instance.key)
+
+
+@receiver(post_delete, sender=Recipe)
+def release_recipe_image(sender, instance, **kwargs):
+    """Delete the deleted recipe's image once nothing else uses it."""
+    if instance.image:
+        release_image(
+            instance.image.name, instance.image_variants.values())
@@ -0,0 +1,124 @@
+"""
+MinHash signatures of recipe tag and ingredient sets.
+
+Each recipe stores the minimum of ``NUM_PERM`` universal hashes over the
+ids of its tags and ingredients. The fraction of positions two signatures
+agree on estimates the Jaccard similarity of the two sets, so ranking a
+user's recipes against one of them is a single NumPy comparison over a
+(recipes x NUM_PERM) matrix instead of a set intersection per recipe.
+"""
+import numpy as np
+from django.conf import settings
+
+from core.cache import TTLCache
+from core.models import LibraryVersion, Recipe
+
+
+# Changing the number of hashes or the seed invalidates stored signatures,
+# which are then recomputed on first use.
+NUM_PERM = 128
+_PRIME = np.uint64(2 ** 32 - 5)
+_rng = np.random.default_rng(20240611)
+_A = _rng.integers(1, int(_PRIME), NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, int(_PRIME), NUM_PERM, dtype=np.uint64)
+
+# Signature matrices by user and library version, so they never need
+# explicit invalidation.
+_matrices = TTLCache(
+    settings.RECIPE_SIMILARITY_CACHE["MAXSIZE"],
+    settings.RECIPE_SIMILARITY_CACHE["TTL"],
+)
+
+
+def signature(tag_ids, ingredient_ids):
+    """
+    Return the MinHash signature of a recipe as bytes, empty when it has
+    neither tags nor ingredients.
+    """
+    # Tags and ingredients have separate id sequences, keep them apart.
+    elements = [2 * tag_id for tag_id in tag_ids]
+    elements += [2 * ingredient_id + 1 for ingredient_id in ingredient_ids]
+    if not elements:
+        return b""
+    x = np.array(elements, dtype=np.uint64)[:, None] % _PRIME
+    hashes = (x * _A + _B) % _PRIME
+    return hashes.min(axis=0).astype("<u4").tobytes()
+
+
+def refresh_signatures(recipe_ids):
+    """
+    Recompute and store the signatures of ``recipe_ids``. Returns them by
+    recipe id.
+    """
+    related = {recipe_id: ([], []) for recipe_id in recipe_ids}
+    if not related:
+        return {}
+    for position, field_name in enumerate(["tags", "ingredients"]):
+        field = Recipe._meta.get_field(field_name)
+        rows = field.remote_field.through.objects.filter(**{
+            f"{field.m2m_column_name()}__in": list(related),
+        }).values_list(field.m2m_column_name(), field.m2m_reverse_name())
+        for recipe_id, related_id in rows:
+            related[recipe_id][position].append(related_id)
+
+    signatures = {
+        recipe_id: signature(*ids) for recipe_id, ids in related.items()
+    }
+    Recipe.objects.bulk_update([
+        Recipe(id=recipe_id, similarity_signature=value)
+        for recipe_id, value in signatures.items()
+    ], ["similarity_signature"], batch_size=1000)
+    return signatures
+
+
+def _signature_matrix(user_id):
+    """
+    Return the ids and the signature matrix of the user's recipes that
+    have tags or ingredients, computing missing signatures first.
+    """
+    key = (user_id, *LibraryVersion.objects.current(user_id))
+    cached = _matrices.get(key)
+    if cached is not None:
+        return cached
+
+    size = NUM_PERM * 4
+    signatures, stale = {}, []
+    rows = Recipe.objects.filter(user_id=user_id).values_list(
+        "id", "similarity_signature")
+    for recipe_id, value in rows.iterator(chunk_size=5000):
+        if value is None or len(value) not in (0, size):
+            stale.append(recipe_id)
+        elif value:
+            signatures[recipe_id] = bytes(value)
+    signatures.update(
+        (recipe_id, value)
+        for recipe_id, value in refresh_signatures(stale).items() if value
+    )
+
+    matrix = np.frombuffer(
+        b"".join(signatures.values()), dtype="<u4",
+    ).reshape(len(signatures), NUM_PERM)
+    cached = (np.fromiter(signatures, dtype=np.int64), matrix)
+    _matrices.set(key, cached)
+    return cached
+
+
+def similar_recipes(recipe, limit):
+    """
+    Return up to ``limit`` ``(recipe id, similarity)`` pairs of the owner's
+    other recipes sharing tags or ingredients with ``recipe``, most
+    similar first. Similarities are MinHash estimates of the Jaccard index.
+    """
+    ids, matrix = _signature_matrix(recipe.user_id)
+    position = np.flatnonzero(ids == recipe.id)
+    if not position.size:
+        return []
+    scores = (matrix == matrix[position[0]]).mean(axis=1)
+    scores[position[0]] = 0
+    candidates = np.flatnonzero(scores)
+    # Highest score first, then newest, so ties at the limit are stable.
+    order = np.lexsort((-ids[candidates], -scores[candidates]))[:limit]
+    return [
+        (int(ids[index]), float(scores[index]))
+        for index in candidates[order]
+    ]
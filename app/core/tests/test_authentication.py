@@ -0,0 +1,120 @@
+"""
+Tests for the cached token authentication.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.authentication import CachedTokenAuthentication, token_digest
+
+
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        },
+    },
+    TOKEN_AUTH_CACHE={"TTL": 60, "CACHE_ALIAS": "default"},
+)
+class CachedTokenAuthenticationTests(TestCase):
+    """Test caching of authenticated tokens."""
+
+    def setUp(self):
+        caches["default"].clear()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+            name="Test Name",
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_cached_token_skips_database(self):
+        """Test a token is only looked up in the database once"""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+        self.assertTrue(user.is_active)
+        self.assertEqual(token, self.token)
+
+    def test_cached_user_fields_loaded_on_access(self):
+        """Test other fields of a cached token's user are still readable"""
+        self.auth.authenticate_credentials(self.token.key)
+        user, token = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user.name, "Test Name")
+
+    def test_only_user_id_cached(self):
+        """Test the cache holds the user id and active flag, not the user"""
+        self.auth.authenticate_credentials(self.token.key)
+
+        entry = caches["default"].get(token_digest(self.token.key))
+
+        self.assertEqual(entry, {"user_id": self.user.id, "is_active": True})
+
+    async def test_async_uses_shared_cache(self):
+        """Test async lookups share cache entries with sync ones"""
+        await self.auth.aauthenticate_credentials(self.token.key)
+        entry = await caches["default"].aget(token_digest(self.token.key))
+
+        user, token = await self.auth.aauthenticate_credentials(
+            self.token.key)
+
+        self.assertEqual(entry["user_id"], self.user.id)
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_invalid_token_rejected(self):
+        """Test an unknown token raises an authentication error"""
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials("invalid")
+
+    def test_user_update_invalidates_cache(self):
+        """Test saving a user drops their cached credentials"""
+        self.auth.authenticate_credentials(self.token.key)
+
+        self.user.name = "New Name"
+        self.user.save()
+
+        self.assertIsNone(
+            caches["default"].get(token_digest(self.token.key)))
+
+    def test_deactivated_user_rejected(self):
+        """Test a deactivated user can no longer authenticate"""
+        self.auth.authenticate_credentials(self.token.key)
+
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token can no longer authenticate"""
+        key = self.token.key
+        self.auth.authenticate_credentials(key)
+
+        self.token.delete()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.authenticate_credentials(key)
+
+    @override_settings(TOKEN_AUTH_CACHE={"TTL": 60, "CACHE_ALIAS": None})
+    def test_user_save_without_cache(self):
+        """Test saving a user skips the token lookup without a cache"""
+        with self.assertNumQueries(1):
+            self.user.save()
+
+    @override_settings(TOKEN_AUTH_CACHE={"TTL": 60, "CACHE_ALIAS": None})
+    def test_no_cache_configured(self):
+        """Test tokens are looked up every time without a shared cache"""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(1):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user.name, "Test Name")
@@ -0,0 +1,29 @@
+"""
+Tests for the in-process caches.
+"""
+from django.test import SimpleTestCase
+
+from core.cache import TTLCache
+
+
+class TTLCacheTests(SimpleTestCase):
+    """Test the in-process LRU cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest unused entry is evicted when full"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_entries_expire(self):
+        """Test entries are dropped after their TTL"""
+        cache = TTLCache(maxsize=2, ttl=-1)
+        cache.set("a", 1)
+
+        self.assertIsNone(cache.get("a"))
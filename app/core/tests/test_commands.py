@@ -1,13 +1,28 @@
 """
 Command Tests
 """
+import io
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import skipUnless
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2OpError
 
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase
+
+from core.models import Recipe, Tag, Ingredient
+from core.similarity import signature
 
 
 @patch("core.management.commands.wait_for_db.Command.check")
@@ -43,3 +58,231 @@ class CommandTests(SimpleTestCase):
         self.assertEqual(patched_check.call_count, 6)
         # Assert that the `check` method is called with the correct parameters
         patched_check.assert_called_with(databases=["default"])
+
+
+class ImportRecipesCommandTests(TestCase):
+    """Test the import_recipes command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+
+    def _write(self, suffix, content):
+        """Write ``content`` to a temporary file and return its path."""
+        f = tempfile.NamedTemporaryFile(
+            "w", suffix=suffix, delete=False, encoding="utf-8")
+        with f:
+            f.write(content)
+        self.addCleanup(os.remove, f.name)
+        return f.name
+
+    def test_import_ndjson(self):
+        """Test importing recipes with tags and ingredients from NDJSON"""
+        rows = [
+            {
+                "title": f"Recipe {i}",
+                "time_minutes": 5,
+                "price": "2.50",
+                "tags": [{"name": "Dinner"}],
+                "ingredients": [{"name": "Salt"}, {"name": f"Extra {i}"}],
+            }
+            for i in range(3)
+        ]
+        path = self._write(
+            ".ndjson", "\n".join(json.dumps(row) for row in rows))
+
+        call_command(
+            "import_recipes", path, user="user@example.com", batch_size=2,
+            stdout=io.StringIO())
+
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 3)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 4)
+        recipe = recipes.get(title="Recipe 1")
+        self.assertEqual(
+            sorted(i.name for i in recipe.ingredients.all()),
+            ["Extra 1", "Salt"],
+        )
+
+    def test_import_csv(self):
+        """Test importing recipes from CSV with a user column"""
+        path = self._write(".csv", (
+            "user,title,time_minutes,price,tags,ingredients\n"
+            "user@example.com,Soup,20,4.50,Dinner|Vegan,Water\n"
+        ))
+
+        call_command("import_recipes", path, stdout=io.StringIO())
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.time_minutes, 20)
+        self.assertEqual(recipe.price, Decimal("4.50"))
+        self.assertEqual(recipe.tags.count(), 2)
+
+    def test_import_stores_signatures(self):
+        """Test imported recipes get their similarity signature"""
+        path = self._write(".csv", (
+            "user,title,time_minutes,price,tags,ingredients\n"
+            "user@example.com,Soup,20,4.50,Dinner,Water\n"
+            "user@example.com,Toast,5,1.00,,\n"
+        ))
+
+        call_command("import_recipes", path, stdout=io.StringIO())
+
+        soup = Recipe.objects.get(title="Soup")
+        self.assertEqual(bytes(soup.similarity_signature), signature(
+            [soup.tags.get().id], [soup.ingredients.get().id]))
+        toast = Recipe.objects.get(title="Toast")
+        self.assertEqual(bytes(toast.similarity_signature), b"")
+
+    def test_invalid_rows_skipped(self):
+        """Test rows with an unknown user or invalid fields are skipped"""
+        path = self._write(".csv", (
+            "user,title,time_minutes,price\n"
+            "other@example.com,Soup,20,4.50\n"
+            "user@example.com,Soup,soon,4.50\n"
+            "user@example.com,Stew,30,5.00\n"
+        ))
+        stderr = io.StringIO()
+
+        call_command(
+            "import_recipes", path, stdout=io.StringIO(), stderr=stderr)
+
+        self.assertEqual(
+            list(Recipe.objects.values_list("title", flat=True)), ["Stew"])
+        self.assertIn("Line 2", stderr.getvalue())
+        self.assertIn("Line 3", stderr.getvalue())
+
+    def test_malformed_ndjson_rows_skipped(self):
+        """Test broken lines, non-object rows and bad names are skipped"""
+        lines = [
+            json.dumps({"title": "Soup", "time_minutes": 5, "price": "1.00"}),
+            '{"title": "Broken", ',
+            json.dumps(["not", "an", "object"]),
+            json.dumps({"title": "Stew", "time_minutes": 5, "price": "1.00",
+                        "tags": [{"name": "x" * 256}]}),
+            json.dumps({"title": "Pie", "time_minutes": 5, "price": "1.00",
+                        "ingredients": 7}),
+            json.dumps({"title": "Rice", "time_minutes": 5, "price": "1.00",
+                        "tags": [{"name": " Dinner "}]}),
+        ]
+        path = self._write(".ndjson", "\n".join(lines))
+        stdout, stderr = io.StringIO(), io.StringIO()
+
+        call_command(
+            "import_recipes", path, user="user@example.com",
+            stdout=stdout, stderr=stderr)
+
+        self.assertEqual(
+            sorted(Recipe.objects.values_list("title", flat=True)),
+            ["Rice", "Soup"])
+        self.assertEqual(
+            list(Tag.objects.values_list("name", flat=True)), ["Dinner"])
+        for number in range(2, 6):
+            self.assertIn(f"Line {number}:", stderr.getvalue())
+        self.assertIn("skipped 4", stdout.getvalue())
+
+    @skipUnless(connection.vendor == "postgresql", "needs PostgreSQL")
+    def test_import_copy(self):
+        """Test --copy writes recipes, links and empty text columns"""
+        path = self._write(".csv", (
+            "user,title,time_minutes,price,tags,ingredients\n"
+            "user@example.com,Soup,20,4.50,Dinner,Water|Salt\n"
+            "user@example.com,Toast,5,1.00,,\n"
+        ))
+
+        call_command(
+            "import_recipes", path, copy=True, stdout=io.StringIO())
+
+        soup = Recipe.objects.get(title="Soup")
+        self.assertEqual(soup.description, "")
+        self.assertEqual(soup.link, "")
+        self.assertEqual(soup.image_variants, {})
+        self.assertEqual(soup.ingredients.count(), 2)
+        self.assertEqual(bytes(soup.similarity_signature), signature(
+            [soup.tags.get().id],
+            soup.ingredients.values_list("id", flat=True)))
+        toast = Recipe.objects.get(title="Toast")
+        self.assertEqual(bytes(toast.similarity_signature), b"")
+
+    def test_copy_requires_postgresql(self):
+        """Test --copy is rejected on other databases"""
+        path = self._write(".ndjson", "")
+
+        with patch.object(connection, "vendor", "sqlite"):
+            with self.assertRaises(CommandError):
+                call_command("import_recipes", path, copy=True)
+
+
+class SweepMediaCommandTests(TestCase):
+    """Test the sweep_media command."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = self.settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.recipe = Recipe.objects.create(
+            user=user,
+            title="Soup",
+            time_minutes=5,
+            price=Decimal("2.50"),
+            image="uploads/recipe/live.jpg",
+        )
+
+    def _create(self, *names):
+        """Create empty files in storage."""
+        for name in names:
+            default_storage.save(name, ContentFile(b""))
+
+    def test_sweep_deletes_unused_files(self):
+        """Test only files no recipe uses are deleted"""
+        self._create(
+            "uploads/recipe/live.jpg",
+            "uploads/recipe/live_thumbnail.webp",
+            "uploads/recipe/live_medium_1024q80.webp",
+            "uploads/recipe/orphan.jpg",
+            "uploads/recipe/orphan_thumbnail.webp",
+        )
+
+        call_command("sweep_media", min_age=0, stdout=io.StringIO())
+
+        self.assertTrue(default_storage.exists("uploads/recipe/live.jpg"))
+        self.assertTrue(
+            default_storage.exists("uploads/recipe/live_thumbnail.webp"))
+        self.assertTrue(
+            default_storage.exists("uploads/recipe/live_medium_1024q80.webp"))
+        self.assertFalse(default_storage.exists("uploads/recipe/orphan.jpg"))
+        self.assertFalse(
+            default_storage.exists("uploads/recipe/orphan_thumbnail.webp"))
+
+    def test_sweep_keeps_recent_files(self):
+        """Test files younger than --min-age are kept"""
+        self._create("uploads/recipe/orphan.jpg")
+
+        call_command("sweep_media", stdout=io.StringIO())
+
+        self.assertTrue(default_storage.exists("uploads/recipe/orphan.jpg"))
+
+    def test_sweep_resumes_from_cursor(self):
+        """Test a limited run continues where the previous one stopped"""
+        names = [f"uploads/recipe/blobs/{i}/orphan.jpg" for i in range(3)]
+        self._create(*names)
+
+        call_command("sweep_media", min_age=0, limit=2, stdout=io.StringIO())
+        self.assertEqual(
+            [default_storage.exists(name) for name in names],
+            [False, False, True],
+        )
+
+        call_command("sweep_media", min_age=0, limit=2, stdout=io.StringIO())
+        self.assertFalse(default_storage.exists(names[2]))
+        self.assertFalse(default_storage.exists(".sweep_media_cursor"))
@@ -0,0 +1,49 @@
+"""
+Tests for the tuned password hashers.
+"""
+import threading
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import SimpleTestCase, override_settings
+
+from core.hashing import run_hashing
+
+
+class HasherTests(SimpleTestCase):
+    """Test hashing cost and offloading settings."""
+
+    @override_settings(PASSWORD_HASHER_OPTIONS={"PBKDF2_ITERATIONS": 1000})
+    def test_pbkdf2_iterations_from_settings(self):
+        """Test PBKDF2 uses the configured iteration count"""
+        encoded = make_password("testpass123")
+
+        self.assertTrue(encoded.startswith("pbkdf2_sha256$1000$"))
+        self.assertTrue(check_password("testpass123", encoded))
+
+    @override_settings(
+        PASSWORD_HASHERS=[
+            "core.hashers.TunedScryptPasswordHasher",
+            "core.hashers.TunedPBKDF2PasswordHasher",
+        ],
+        PASSWORD_HASHER_OPTIONS={"SCRYPT_WORK_FACTOR": 2 ** 10},
+    )
+    def test_scrypt_selectable(self):
+        """Test scrypt can be selected with a custom work factor"""
+        encoded = make_password("testpass123")
+
+        self.assertTrue(encoded.startswith("scrypt$1024$"))
+        self.assertTrue(check_password("testpass123", encoded))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=2)
+    def test_hashing_runs_on_pool(self):
+        """Test hashing is offloaded to the hashing pool"""
+        name = run_hashing(lambda: threading.current_thread().name)
+
+        self.assertTrue(name.startswith("password-hashing"))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=0)
+    def test_hashing_inline_without_workers(self):
+        """Test hashing runs on the caller without workers"""
+        name = run_hashing(lambda: threading.current_thread().name)
+
+        self.assertEqual(name, threading.current_thread().name)
@@ -4,6 +4,7 @@ Tests for models.
 
 from decimal import Decimal
 from unittest.mock import patch
+from django.db.utils import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -104,6 +105,31 @@ class ModelTests(TestCase):
         self.assertEqual(str(ingredient), ingredient.name)
         self.assertEqual(ingredient.user.id, user.id)
 
+    def test_get_or_create_many(self):
+        """Test resolving names reuses existing objects and creates others"""
+        user = create_user()
+        other_user = create_user(email="other@example.com")
+        existing = models.Tag.objects.create(user=user, name="Vegan")
+        models.Tag.objects.create(user=other_user, name="Dinner")
+
+        tags = models.Tag.objects.get_or_create_many(
+            user, ["Dinner", "Vegan", "Dinner"])
+
+        self.assertEqual([tag.name for tag in tags], ["Dinner", "Vegan"])
+        self.assertEqual(tags[1], existing)
+        self.assertEqual(tags[0].user, user)
+        self.assertEqual(models.Tag.objects.filter(user=user).count(), 2)
+
+    def test_tag_name_unique_per_user(self):
+        """Test a user cannot have two tags with the same name"""
+        user = create_user()
+        other_user = create_user(email="other@example.com")
+        models.Tag.objects.create(user=user, name="Vegan")
+        models.Tag.objects.create(user=other_user, name="Vegan")
+
+        with self.assertRaises(IntegrityError):
+            models.Tag.objects.create(user=user, name="Vegan")
+
     @patch("core.models.uuid.uuid4")
     def test_recipe_filename_uuid(self, mock_uuid):
         """Test generatign image path"""
@@ -112,3 +138,15 @@ class ModelTests(TestCase):
         file_path = models.recipe_image_file_path(None, "example.jpg")
 
         self.assertEqual(file_path, f"uploads/recipe/{uuid}.jpg")
+
+    def test_image_blob_reference_counting(self):
+        """Test image blobs are shared and deleted with the last reference"""
+        name, created = models.ImageBlob.objects.acquire("abc", "a.jpg")
+        self.assertTrue(created)
+        name, created = models.ImageBlob.objects.acquire("abc", "other.jpg")
+        self.assertFalse(created)
+        self.assertEqual(name, "a.jpg")
+
+        self.assertFalse(models.ImageBlob.objects.release("a.jpg"))
+        self.assertTrue(models.ImageBlob.objects.release("a.jpg"))
+        self.assertFalse(models.ImageBlob.objects.exists())
@@ -0,0 +1,31 @@
+"""
+Tests for the in-process thread pools.
+"""
+from django.test import SimpleTestCase
+
+from core.pools import ResizablePool
+
+
+class ResizablePoolTests(SimpleTestCase):
+    """Test the resizable named thread pool."""
+
+    def setUp(self):
+        self.pool = ResizablePool("test-pool")
+        self.addCleanup(lambda: self.pool.get(1).shutdown())
+
+    def test_pool_reused_for_same_size(self):
+        """Test the same pool is returned while the size is unchanged"""
+        self.assertIs(self.pool.get(2), self.pool.get(2))
+
+    def test_pool_recreated_on_resize(self):
+        """Test a new pool is created when the size changes"""
+        first = self.pool.get(2)
+
+        self.assertIsNot(self.pool.get(3), first)
+
+    def test_in_worker(self):
+        """Test pool threads are told apart from other threads"""
+        inside = self.pool.get(1).submit(self.pool.in_worker).result()
+
+        self.assertTrue(inside)
+        self.assertFalse(self.pool.in_worker())
@@ -0,0 +1,98 @@
+"""
+Tests for MinHash recipe similarity.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from core.models import Recipe, Tag, Ingredient
+from core.similarity import (
+    NUM_PERM, refresh_signatures, signature, similar_recipes)
+
+
+def create_recipe(user, tags=(), ingredients=()):
+    """Create a recipe linked to tags and ingredients of those names."""
+    recipe = Recipe.objects.create(
+        user=user, title="Sample", time_minutes=5, price=Decimal("1.00"))
+    for name in tags:
+        recipe.tags.add(Tag.objects.get_or_create(user=user, name=name)[0])
+    for name in ingredients:
+        recipe.ingredients.add(
+            Ingredient.objects.get_or_create(user=user, name=name)[0])
+    return recipe
+
+
+class SignatureTests(SimpleTestCase):
+    """Test MinHash signatures."""
+
+    def test_signature_size(self):
+        """Test a signature holds one 32 bit value per hash"""
+        self.assertEqual(len(signature([1, 2], [3])), NUM_PERM * 4)
+
+    def test_empty_signature(self):
+        """Test recipes without tags or ingredients have no signature"""
+        self.assertEqual(signature([], []), b"")
+
+    def test_signature_ignores_order(self):
+        """Test equal sets have equal signatures"""
+        self.assertEqual(signature([3, 1], [2]), signature([1, 3], [2]))
+
+    def test_tags_and_ingredients_kept_apart(self):
+        """Test a tag and an ingredient with the same id differ"""
+        self.assertNotEqual(signature([1], []), signature([], [1]))
+
+
+class SimilarRecipesTests(TestCase):
+    """Test ranking recipes by similarity."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email="user@example.com", password="testpass123")
+
+    def test_similar_recipes_ranked(self):
+        """Test recipes sharing more tags and ingredients rank first"""
+        recipe = create_recipe(self.user, ["Dinner"], ["Rice", "Chicken"])
+        same = create_recipe(self.user, ["Dinner"], ["Rice", "Chicken"])
+        close = create_recipe(self.user, ["Dinner"], ["Rice"])
+        create_recipe(self.user, ["Dessert"], ["Sugar"])
+        create_recipe(self.user)
+
+        scores = similar_recipes(recipe, 10)
+
+        self.assertEqual([recipe_id for recipe_id, _ in scores],
+                         [same.id, close.id])
+        self.assertEqual(scores[0][1], 1.0)
+
+    def test_ties_at_limit_prefer_newest(self):
+        """Test recipes tied at the limit are cut off by age"""
+        recipe = create_recipe(self.user, ["Dinner"])
+        others = [create_recipe(self.user, ["Dinner"]) for _ in range(20)]
+
+        scores = similar_recipes(recipe, 3)
+
+        self.assertEqual(
+            scores, [(other.id, 1.0) for other in others[:-4:-1]])
+
+    def test_signatures_computed_when_missing(self):
+        """Test recipes without a stored signature get one on first use"""
+        recipe = create_recipe(self.user, ["Dinner"])
+        other = create_recipe(self.user, ["Dinner"])
+
+        similar_recipes(recipe, 10)
+
+        stored = Recipe.objects.filter(id=other.id).values_list(
+            "similarity_signature", flat=True).get()
+        self.assertEqual(bytes(stored), signature(
+            [other.tags.get().id], []))
+
+    def test_refresh_signatures(self):
+        """Test refreshing follows changed tags and ingredients"""
+        recipe = create_recipe(self.user, ["Dinner"], ["Rice"])
+        recipe.ingredients.clear()
+
+        refresh_signatures([recipe.id])
+
+        stored = Recipe.objects.filter(id=recipe.id).values_list(
+            "similarity_signature", flat=True).get()
+        self.assertEqual(bytes(stored), signature([recipe.tags.get().id], []))
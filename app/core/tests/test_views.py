@@ -0,0 +1,76 @@
+"""
+Tests for serving media files.
+"""
+import os
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+
+class ServeMediaTests(TestCase):
+    """Test the media view."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = self.settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        os.makedirs(os.path.join(media_root, "uploads"))
+        with open(os.path.join(media_root, "uploads", "a.jpg"), "wb") as f:
+            f.write(b"0123456789")
+        self.url = reverse("media", args=["uploads/a.jpg"])
+
+    def test_serve_file(self):
+        """Test files are streamed with long lived cache headers"""
+        res = self.client.get(self.url)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b"".join(res.streaming_content), b"0123456789")
+        self.assertEqual(res["Content-Type"], "image/jpeg")
+        self.assertEqual(res["Accept-Ranges"], "bytes")
+        self.assertIn("immutable", res["Cache-Control"])
+
+    def test_serve_range(self):
+        """Test single byte ranges return partial content"""
+        res = self.client.get(self.url, HTTP_RANGE="bytes=2-4")
+
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b"".join(res.streaming_content), b"234")
+        self.assertEqual(res["Content-Range"], "bytes 2-4/10")
+
+        res = self.client.get(self.url, HTTP_RANGE="bytes=-3")
+        self.assertEqual(b"".join(res.streaming_content), b"789")
+
+    def test_unsatisfiable_range(self):
+        """Test ranges past the end of the file are rejected"""
+        res = self.client.get(self.url, HTTP_RANGE="bytes=20-")
+
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res["Content-Range"], "bytes */10")
+
+    def test_not_modified(self):
+        """Test If-Modified-Since is answered without the body"""
+        res = self.client.get(self.url)
+        res = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=res["Last-Modified"])
+
+        self.assertEqual(res.status_code, 304)
+
+    @override_settings(MEDIA_SERVE_BACKEND="x-accel-redirect")
+    def test_accel_redirect(self):
+        """Test nginx is asked to send the file"""
+        res = self.client.get(self.url)
+
+        self.assertEqual(res["X-Accel-Redirect"],
+                         "/protected-media/uploads/a.jpg")
+        self.assertEqual(res.content, b"")
+
+    def test_path_outside_media_root(self):
+        """Test paths escaping MEDIA_ROOT are not served"""
+        res = self.client.get(self.url.replace("uploads/a.jpg", "../etc"))
+
+        self.assertEqual(res.status_code, 404)
@@ -0,0 +1,90 @@
+"""
+Upload handler for recipe images.
+"""
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.uploadhandler import (
+    StopUpload, TemporaryFileUploadHandler)
+from django.utils.translation import gettext as _
+from PIL import Image, UnidentifiedImageError
+
+
+class CappedImageUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream uploaded images to a temporary file in fixed size chunks and
+    reject them as soon as they exceed ``RECIPE_IMAGE_MAX_BYTES`` or their
+    header declares more than ``RECIPE_IMAGE_MAX_PIXELS`` pixels, so a
+    decompression bomb is never decoded. Only the first
+    ``RECIPE_IMAGE_MAX_HEADER_BYTES`` are kept in memory to read the header.
+
+    A rejected upload stops storing the file and leaves the reason in
+    ``error``. Accepted files get ``image_format``, ``image_size`` and the
+    sha256 ``content_digest`` computed while streaming.
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_bytes = settings.RECIPE_IMAGE_MAX_BYTES
+        self.max_pixels = settings.RECIPE_IMAGE_MAX_PIXELS
+        self.max_header_bytes = settings.RECIPE_IMAGE_MAX_HEADER_BYTES
+        self.error = None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.header = b""
+        self.image_format = self.image_size = None
+        self.digest = hashlib.sha256()
+
+    def _reject(self, message):
+        """
+        Record ``message`` and stop storing the upload. The rest of the body
+        is read and discarded, not stored, so the view can still answer with
+        a 400; resetting the connection would leave clients with no response.
+        """
+        self.error = message
+        raise StopUpload()
+
+    def _read_header(self, final=False):
+        """Identify the image from the bytes received so far."""
+        try:
+            # Image.open only parses the header, pixels are not decoded.
+            with Image.open(io.BytesIO(self.header)) as image:
+                self.image_format, self.image_size = image.format, image.size
+        except Image.DecompressionBombError:
+            # Pillow's own limit, only reached when the header declares
+            # far more pixels than the cap below.
+            self._reject(_("Images may have at most %d pixels.")
+                         % self.max_pixels)
+        except (UnidentifiedImageError, SyntaxError, OSError):
+            if final or len(self.header) >= self.max_header_bytes:
+                self._reject(_("Upload a valid image."))
+            return
+
+        width, height = self.image_size
+        if self.image_format not in settings.RECIPE_IMAGE_FORMATS:
+            self._reject(_("Unsupported image format %s.") % self.image_format)
+        if width * height > self.max_pixels:
+            self._reject(_("Images may have at most %d pixels.")
+                         % self.max_pixels)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            self._reject(_("Images may be at most %d bytes.") % self.max_bytes)
+        if self.image_format is None:
+            self.header += raw_data[:self.max_header_bytes - len(self.header)]
+            self._read_header()
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self.image_format is None:
+            self._read_header(final=True)
+        file = super().file_complete(file_size)
+        file.image_format = self.image_format
+        file.image_size = self.image_size
+        file.content_digest = self.digest.hexdigest()
+        return file
@@ -0,0 +1,108 @@
+"""
+Serving of uploaded media files.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse)
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+CHUNK_SIZE = 64 * 1024
+
+
+def _read_range(path, start, length):
+    """Yield ``length`` bytes of the file at ``path`` from ``start``."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _parse_range(header, size):
+    """
+    Return ``(start, end)`` of a single byte range, None for no or an
+    unsupported Range header, and False when it cannot be satisfied.
+    """
+    match = RANGE_RE.match(header or "")
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range, the last ``last`` bytes.
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def serve_media(request, path):
+    """
+    Serve a file from MEDIA_ROOT. Names are never reused for different
+    content (uploads get unique names, variant names include their size
+    and quality), so responses are cacheable forever. With ``MEDIA_SERVE_BACKEND`` set the
+    bytes are left to the web server through X-Accel-Redirect (nginx) or
+    X-Sendfile (Apache, lighttpd), otherwise they are streamed in chunks
+    with support for single byte ranges.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    stat = os.stat(full_path)
+    content_type = mimetypes.guess_type(full_path)[0] or \
+        "application/octet-stream"
+    if not was_modified_since(
+            request.META.get("HTTP_IF_MODIFIED_SINCE"), stat.st_mtime):
+        response = HttpResponseNotModified()
+    elif settings.MEDIA_SERVE_BACKEND == "x-accel-redirect":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = \
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + path
+    elif settings.MEDIA_SERVE_BACKEND == "x-sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = full_path
+    else:
+        byte_range = _parse_range(request.META.get("HTTP_RANGE"), stat.st_size)
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stat.st_size}"
+            return response
+        start, end = byte_range or (0, stat.st_size - 1)
+        response = StreamingHttpResponse(
+            _read_range(full_path, start, end - start + 1),
+            content_type=content_type,
+            status=206 if byte_range else 200,
+        )
+        response["Content-Length"] = str(end - start + 1)
+        if byte_range:
+            response["Content-Range"] = \
+                f"bytes {start}-{end}/{stat.st_size}"
+        response["Accept-Ranges"] = "bytes"
+
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.MEDIA_CACHE_MAX_AGE,
+        immutable=True,
+    )
+    return response
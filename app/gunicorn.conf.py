@@ -0,0 +1,29 @@
+"""
+Gunicorn configuration for the production entrypoint.
+
+Runs app.wsgi by default; set GUNICORN_WORKER_CLASS to
+uvicorn.workers.UvicornWorker and the app module to app.asgi:application
+for ASGI.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# One process per core plus one, each with a few threads so requests
+# waiting on the database do not block a whole process.
+workers = int(os.environ.get(
+    "WEB_CONCURRENCY", multiprocessing.cpu_count() + 1))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+# Recycle workers now and then so slow leaks cannot grow unbounded; the
+# jitter keeps them from all restarting at once.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = timeout
+keepalive = 5
+
+accesslog = "-"
@@ -0,0 +1,172 @@
+"""
+Async views for reading recipes, tags and ingredients.
+
+DRF 3.14 only has synchronous views, so under ASGI each request holds a
+thread for its whole lifetime. These plain Django views use the async ORM
+instead and keep a worker free while they wait on the database or a slow
+client. They return the same representations as the viewsets, with keyset
+pagination through a ``before`` parameter in the ``next`` link.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import prefetch_related_objects
+from django.http import HttpResponseNotAllowed, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import (
+    AuthenticationFailed, NotAuthenticated, ValidationError)
+
+from core.authentication import CachedTokenAuthentication
+from core.models import Recipe, Tag, Ingredient, LibraryVersion
+from recipe.api.filters import (
+    filter_assigned_only, filter_by_range, filter_by_related)
+from recipe.api.mixins import library_validators
+from recipe.api.pagination import RecipeCursorPagination
+from recipe.api.serializers import (
+    RecipeSerializer, RecipeDetailSerializer,
+    TagSerializer, IngredientSerializer)
+
+
+authentication = CachedTokenAuthentication()
+
+
+def async_read_view(view):
+    """
+    Restrict ``view`` to GET and HEAD, authenticate its token, answer
+    conditional requests from the library version and turn query
+    parameter errors into 400 responses.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return HttpResponseNotAllowed(["GET", "HEAD"])
+
+        try:
+            credentials = await authentication.aauthenticate(request)
+        except AuthenticationFailed as exc:
+            credentials, detail = None, exc.detail
+        else:
+            detail = NotAuthenticated.default_detail
+        if credentials is None:
+            response = JsonResponse({"detail": str(detail)}, status=401)
+            response["WWW-Authenticate"] = \
+                authentication.authenticate_header(request)
+            return response
+        request.user, request.auth = credentials
+
+        version, modified_at = await LibraryVersion.objects.acurrent(
+            request.user)
+        etag, last_modified = library_validators(
+            request.user,
+            version,
+            modified_at,
+            request.build_absolute_uri(),
+            "application/json",
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            try:
+                response = await view(request, *args, **kwargs)
+            except ValidationError as exc:
+                return JsonResponse(exc.detail, status=400)
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+    return wrapper
+
+
+async def _paginate(request, queryset, field_name):
+    """
+    Return one page of ``queryset`` in descending ``field_name`` order and
+    the link to the next page, if any.
+    """
+    try:
+        size = int(request.GET.get(
+            "page_size", settings.RECIPE_API_PAGE_SIZE))
+    except ValueError:
+        size = settings.RECIPE_API_PAGE_SIZE
+    size = max(1, min(size, RecipeCursorPagination.max_page_size))
+
+    before = request.GET.get("before")
+    if before:
+        field = queryset.model._meta.get_field(field_name)
+        try:
+            before = field.to_python(before)
+        except DjangoValidationError:
+            raise ValidationError({"before": [_("Invalid cursor.")]})
+        queryset = queryset.filter(**{f"{field_name}__lt": before})
+
+    items = [
+        item async for item in
+        queryset.order_by(f"-{field_name}")[:size + 1]
+    ]
+    next_url = None
+    if len(items) > size:
+        items = items[:size]
+        params = request.GET.copy()
+        params["before"] = getattr(items[-1], field_name)
+        next_url = request.build_absolute_uri(
+            f"{request.path}?{params.urlencode()}")
+    return items, next_url
+
+
+async def _prefetch(recipes):
+    """
+    Load the tags and ingredients of every recipe with one query each,
+    like prefetch_related does for the synchronous viewsets.
+    """
+    await sync_to_async(prefetch_related_objects)(
+        recipes, "tags", "ingredients")
+
+
+@async_read_view
+async def recipe_list(request):
+    """List the user's recipes, filtered like the recipe viewset."""
+    queryset = filter_by_related(
+        Recipe.objects.filter(user=request.user), request.GET)
+    queryset = filter_by_range(queryset, request.GET)
+    recipes, next_url = await _paginate(request, queryset, "id")
+    await _prefetch(recipes)
+    serializer = RecipeSerializer(
+        recipes, many=True, context={"request": request})
+    return JsonResponse({"next": next_url, "results": serializer.data})
+
+
+@async_read_view
+async def recipe_detail(request, pk):
+    """Return one of the user's recipes."""
+    try:
+        recipe = await Recipe.objects.filter(user=request.user).aget(id=pk)
+    except Recipe.DoesNotExist:
+        return JsonResponse({"detail": _("Not found.")}, status=404)
+    await _prefetch([recipe])
+    serializer = RecipeDetailSerializer(recipe, context={"request": request})
+    return JsonResponse(serializer.data)
+
+
+async def _attr_list(request, model, serializer_class, recipe_field):
+    """List the user's tags or ingredients by descending name."""
+    queryset = filter_assigned_only(
+        model.objects.filter(user=request.user), recipe_field, request.GET)
+    items, next_url = await _paginate(request, queryset, "name")
+    serializer = serializer_class(items, many=True)
+    return JsonResponse({"next": next_url, "results": serializer.data})
+
+
+@async_read_view
+async def tag_list(request):
+    """List the user's tags."""
+    return await _attr_list(request, Tag, TagSerializer, "tags")
+
+
+@async_read_view
+async def ingredient_list(request):
+    """List the user's ingredients."""
+    return await _attr_list(
+        request, Ingredient, IngredientSerializer, "ingredients")
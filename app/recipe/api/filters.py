@@ -0,0 +1,203 @@
+"""
+Query parameter filters shared by the sync and async recipe views.
+"""
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, TrigramWordSimilarity)
+from django.db import connections
+from django.db.models import (
+    BigIntegerField, Case, Count, Exists, F, OuterRef, Q, Value, When)
+from django.db.models.functions import Cast, Upper
+from django.utils.translation import gettext as _
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from core.models import Recipe, Ingredient
+
+
+# Text search configuration of the search vector trigger, migration 0015.
+SEARCH_CONFIG = "english"
+
+
+def params_to_ints(name, value):
+    """Convert a comma separated query parameter to a list of integers."""
+    try:
+        return [int(str_id) for str_id in value.split(",")]
+    except ValueError:
+        msg = _("Expected a comma separated list of ids.")
+        raise ValidationError({name: [msg]})
+
+
+def params_to_limit(query_params, default, maximum):
+    """Return the ``limit`` parameter clamped between 1 and ``maximum``."""
+    try:
+        limit = int(query_params.get("limit", default))
+    except ValueError:
+        raise ValidationError({"limit": [_("A valid integer is required.")]})
+    return max(1, min(limit, maximum))
+
+
+def filter_assigned_only(queryset, recipe_field, query_params):
+    """Keep tags or ingredients linked to a recipe if ``assigned_only``."""
+    assigned_only = query_params.get("assigned_only", "0")
+    if assigned_only in ("", "0"):
+        return queryset
+    # EXISTS stops at the first recipe link, unlike a DISTINCT over the
+    # join which has to expand every link first.
+    field = Recipe._meta.get_field(recipe_field)
+    links = field.remote_field.through.objects.filter(**{
+        field.m2m_reverse_name(): OuterRef("id"),
+    })
+    return queryset.filter(Exists(links))
+
+
+def filter_by_related(queryset, query_params):
+    """Filter recipes by the ``tags`` and ``ingredients`` parameters."""
+    match_all = query_params.get("match") == "all"
+    for field_name in ["tags", "ingredients"]:
+        value = query_params.get(field_name)
+        if not value:
+            continue
+        ids = set(params_to_ints(field_name, value))
+        field = Recipe._meta.get_field(field_name)
+        rows = field.remote_field.through.objects.filter(**{
+            f"{field.m2m_reverse_name()}__in": ids,
+        })
+        if match_all:
+            # Recipes whose through rows cover every requested id.
+            matching = (
+                rows.values(field.m2m_column_name())
+                .annotate(matched=Count(field.m2m_reverse_name()))
+                .filter(matched=len(ids))
+                .values(field.m2m_column_name())
+            )
+            queryset = queryset.filter(id__in=matching)
+        else:
+            queryset = queryset.filter(Exists(rows.filter(**{
+                field.m2m_column_name(): OuterRef("id"),
+            })))
+    return queryset
+
+
+# Query parameter: (lookup, field parsing its value). The lookups are served
+# by the (user, time_minutes, id) and (user, price, id) indexes.
+RANGE_FILTERS = {
+    "max_time": ("time_minutes__lte", serializers.IntegerField(min_value=0)),
+    "min_price": ("price__gte", serializers.DecimalField(
+        max_digits=5, decimal_places=2)),
+    "max_price": ("price__lte", serializers.DecimalField(
+        max_digits=5, decimal_places=2)),
+}
+
+
+def filter_by_range(queryset, query_params):
+    """Filter recipes by ``max_time``, ``min_price`` and ``max_price``."""
+    for name, (lookup, field) in RANGE_FILTERS.items():
+        value = query_params.get(name, "").strip()
+        if not value:
+            continue
+        try:
+            value = field.run_validation(value)
+        except ValidationError as exc:
+            raise ValidationError({name: exc.detail})
+        queryset = queryset.filter(**{lookup: value})
+    return queryset
+
+
+def filter_cookable(queryset, user, query_params):
+    """
+    Rank recipes against the pantry of ingredient ids in ``have`` and
+    names in ``have_names``: those with no missing ingredient first, then
+    by fewest missing. Only recipes using at least one pantry ingredient
+    are kept, annotated with ``matched`` and ``missing`` counts; at most
+    ``max_missing`` may be missing if given.
+    """
+    pantry = Q()
+    value = query_params.get("have")
+    if value:
+        pantry |= Q(id__in=params_to_ints("have", value))
+    names = [
+        name.strip().upper()
+        for name in query_params.get("have_names", "").split(",")
+        if name.strip()
+    ]
+    if names:
+        pantry |= Q(upper_name__in=names)
+    if not pantry:
+        msg = _("Give the ingredients you have in have or have_names.")
+        raise ValidationError({"have": [msg]})
+    pantry_ids = Ingredient.objects.filter(user=user).alias(
+        upper_name=Upper("name")).filter(pantry).values("id")
+
+    field = Recipe._meta.get_field("ingredients")
+    matched = field.remote_field.through.objects.filter(**{
+        f"{field.m2m_reverse_name()}__in": pantry_ids,
+    })
+    # One pass over the candidates' ingredient links, grouped by recipe.
+    queryset = queryset.filter(
+        id__in=matched.values(field.m2m_column_name()),
+    ).annotate(
+        matched=Count("ingredients", filter=Q(ingredients__in=pantry_ids)),
+        missing=Count("ingredients") - F("matched"),
+    )
+    max_missing = query_params.get("max_missing", "").strip()
+    if max_missing:
+        try:
+            max_missing = serializers.IntegerField(
+                min_value=0).run_validation(max_missing)
+        except ValidationError as exc:
+            raise ValidationError({"max_missing": exc.detail})
+        queryset = queryset.filter(missing__lte=max_missing)
+    return queryset.order_by("missing", "-matched", "-id")
+
+
+def filter_search(queryset, query_params):
+    """
+    Filter recipes by the ``search`` parameter. On PostgreSQL it is a web
+    search style query against the GIN indexed search vector, annotated
+    with ``search_key`` to page by rank; other databases fall back to a
+    case insensitive substring match.
+    """
+    search = query_params.get("search", "").strip()
+    if not search:
+        return queryset
+    if connections[queryset.db].vendor != "postgresql":
+        return queryset.filter(
+            Q(title__icontains=search) | Q(description__icontains=search))
+
+    query = SearchQuery(search, config=SEARCH_CONFIG, search_type="websearch")
+    rank = SearchRank(F("search_vector"), query)
+    # Rank and id folded into one exact integer, so the cursor pagination
+    # gets a unique key in rank order.
+    rank_key = Cast(rank * Value(10 ** 6), BigIntegerField())
+    return queryset.filter(search_vector=query).annotate(
+        search_key=rank_key * Value(10 ** 10) + F("id"))
+
+
+def filter_typeahead(queryset, query_params):
+    """
+    Suggest tags or ingredients for the ``q`` parameter: names starting
+    with it first, then on PostgreSQL names containing a word similar to
+    it (trigram indexed, migration 0016), elsewhere names containing it.
+    Returns at most ``limit`` items, already sliced.
+    """
+    q = query_params.get("q", "").strip()
+    if not q:
+        return queryset
+    limit = params_to_limit(
+        query_params, settings.TYPEAHEAD_LIMIT, settings.TYPEAHEAD_MAX_LIMIT)
+
+    queryset = queryset.annotate(prefix=Case(
+        When(name__istartswith=q, then=Value(1)), default=Value(0)))
+    if connections[queryset.db].vendor == "postgresql":
+        upper_q = q.upper()
+        similar = Q(upper_name__trigram_word_similar=upper_q)
+        queryset = queryset.alias(upper_name=Upper("name")).filter(
+            Q(name__istartswith=q) | similar
+        ).annotate(
+            similarity=TrigramWordSimilarity(upper_q, "upper_name"),
+        ).order_by("-prefix", "-similarity", "name")
+    else:
+        queryset = queryset.filter(name__icontains=q).order_by(
+            "-prefix", "name")
+    return queryset[:limit]
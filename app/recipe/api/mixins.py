@@ -0,0 +1,93 @@
+"""
+Viewset mixins for Recipe API
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from rest_framework.response import Response
+
+from core.models import LibraryVersion
+
+
+def library_validators(user, version, modified_at, uri, media_type):
+    """Return the ETag and Last-Modified timestamp of a representation."""
+    representation = ":".join([str(user.id), str(version), uri, media_type])
+    etag = quote_etag(hashlib.sha256(
+        representation.encode()).hexdigest()[:32])
+    last_modified = int(modified_at.timestamp()) if modified_at else None
+    return etag, last_modified
+
+
+class LibraryVersionMixin:
+    """
+    Answer conditional GETs from the user's LibraryVersion.
+
+    Every write through the viewset bumps the version after it completes,
+    so ETag and Last-Modified change whenever the data may have changed.
+    A matching If-None-Match or If-Modified-Since returns 304 without
+    querying the recipe tables. List bodies can also be cached
+    server-side, keyed by that version. Only ``list`` is handled here,
+    other read actions can wrap their handler with ``_conditional``.
+    """
+
+    def _validators(self, request):
+        """Return the ETag and Last-Modified timestamp for ``request``."""
+        version, modified_at = LibraryVersion.objects.current(request.user)
+        return library_validators(
+            request.user,
+            version,
+            modified_at,
+            request.build_absolute_uri(),
+            request.accepted_media_type,
+        )
+
+    def _conditional(self, request, handler, *args, **kwargs):
+        """Run ``handler`` unless the client already has this version."""
+        etag, last_modified = self._validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+
+        if response is None:
+            cache_settings = settings.RECIPE_API_RESPONSE_CACHE
+            cache = None
+            if self.action == "list" and cache_settings["CACHE_ALIAS"]:
+                cache = caches[cache_settings["CACHE_ALIAS"]]
+            data = cache.get(f"recipe-api:{etag}") if cache else None
+            if data is None:
+                response = handler(request, *args, **kwargs)
+                if cache and response.status_code == 200:
+                    cache.set(
+                        f"recipe-api:{etag}",
+                        response.data,
+                        cache_settings["TIMEOUT"],
+                    )
+            else:
+                response = Response(data)
+
+        response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(request, super().list, *args, **kwargs)
+
+    def _bump_version(self):
+        """Mark the user's library as changed."""
+        LibraryVersion.objects.bump(self.request.user)
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self._bump_version()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self._bump_version()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        self._bump_version()
@@ -0,0 +1,139 @@
+"""
+Pagination classes for Recipe API
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.utils.translation import gettext as _
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class RecipeCursorPagination(CursorPagination):
+    """
+    Keyset pagination for recipes, newest first.
+    Deep pages cost the same as the first one, unlike OFFSET pagination.
+    """
+    ordering = "-id"
+    page_size = settings.RECIPE_API_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    ordering_param = "ordering"
+    # Columns the ``ordering`` parameter accepts, each backed by a
+    # (user, column, id) index, see core.models.Recipe.
+    ordering_fields = ("id", "time_minutes", "price")
+
+    def get_ordering(self, request, queryset, view):
+        # Ranked search results, see recipe.api.filters.filter_search.
+        if "search_key" in queryset.query.annotations:
+            return ("-search_key",)
+        ordering = request.query_params.get(self.ordering_param, "").strip()
+        if not ordering or not self.ordering_fields:
+            return super().get_ordering(request, queryset, view)
+        field = ordering.lstrip("-")
+        if field not in self.ordering_fields or ordering.count("-") > 1:
+            msg = _("Expected one of %(fields)s, optionally prefixed with -.")
+            raise ValidationError({self.ordering_param: [
+                msg % {"fields": ", ".join(self.ordering_fields)}]})
+        if field == "id":
+            return (ordering,)
+        # Ids in the same direction order ties and walk the same index.
+        return (ordering, "-id" if ordering.startswith("-") else "id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Page like CursorPagination, but keep the position on every ordering
+        column. CursorPagination only keeps it on the first one and skips
+        ties with an OFFSET capped at ``offset_cutoff``, which loops forever
+        once more rows share a time or price.
+        """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            # Test for: (cursor reversed) XOR (queryset reversed)
+            descending = self.ordering[0].startswith("-")
+            lookup = "lt" if reverse != descending else "gt"
+            queryset = queryset.filter(
+                self._after(queryset.model, current_position, lookup))
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(
+                results[-1], self.ordering)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = following_position is not None
+            self.next_position = current_position
+            self.previous_position = following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position = following_position
+            self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _after(self, model, position, lookup):
+        """
+        Return the filter for rows past ``position`` in the ``lookup``
+        direction, comparing ``(column, id)`` as a pair when ordering by
+        two columns.
+        """
+        fields = [order.lstrip("-") for order in self.ordering]
+        if len(fields) == 1:
+            return Q(**{f"{fields[0]}__{lookup}": position})
+        values = position.split(",")
+        if len(values) != len(fields):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            value, last_id = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(fields, values)
+            ]
+        except DjangoValidationError:
+            raise NotFound(self.invalid_cursor_message)
+        return Q(**{f"{fields[0]}__{lookup}": value}) | Q(**{
+            fields[0]: value, f"{fields[1]}__{lookup}": last_id})
+
+    def _get_position_from_instance(self, instance, ordering):
+        # Only numeric columns are combined with the id, so a comma can
+        # separate the values of a two column position.
+        return ",".join(
+            str(instance[order.lstrip("-")] if isinstance(instance, dict)
+                else getattr(instance, order.lstrip("-")))
+            for order in ordering
+        )
+
+
+class NameCursorPagination(RecipeCursorPagination):
+    """Keyset pagination for tags and ingredients ordered by name."""
+    ordering = "-name"
+    ordering_fields = ()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Typeahead suggestions come ranked and limited as a single page,
+        # see recipe.api.filters.filter_typeahead.
+        if queryset.query.is_sliced:
+            self.has_next = self.has_previous = False
+            return list(queryset)
+        return super().paginate_queryset(queryset, request, view)
@@ -2,12 +2,18 @@
 Serializers for recipe API
 """
 
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
+from core.images import release_image, store_image
 from core.models import (Recipe,
                          Tag,
                          Ingredient
                          )
+from core.similarity import refresh_signatures, signature
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -27,59 +33,170 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ["id"]
 
 
+class RecipeListSerializer(serializers.ListSerializer):
+    """Create and update many recipes with set based queries."""
+    related_models = {"tags": Tag, "ingredients": Ingredient}
+
+    def _resolve(self, validated_data):
+        """Return {field name: {name: object}} for every item's relations."""
+        auth_user = self.context['request'].user
+        resolved = {}
+        for field_name, model in self.related_models.items():
+            names = [
+                attr["name"]
+                for item in validated_data
+                for attr in item.get(field_name) or []
+            ]
+            resolved[field_name] = {
+                obj.name: obj
+                for obj in model.objects.get_or_create_many(auth_user, names)
+            }
+        return resolved
+
+    def _signature(self, resolved, item):
+        """Return the similarity signature of a validated item."""
+        return signature(*[
+            [objs[attr["name"]].id for attr in item.get(field_name) or []]
+            for field_name, objs in resolved.items()
+        ])
+
+    def create(self, validated_data):
+        """Create recipes and their relations in a handful of queries."""
+        resolved = self._resolve(validated_data)
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                similarity_signature=self._signature(resolved, item),
+                **{
+                    attr: value for attr, value in item.items()
+                    if attr not in self.related_models
+                },
+            )
+            for item in validated_data
+        ])
+        for field_name, objs in resolved.items():
+            Recipe.objects.add_related(field_name, [
+                (recipe.id, objs[attr["name"]].id)
+                for recipe, item in zip(recipes, validated_data)
+                for attr in item.get(field_name) or []
+            ])
+        return recipes
+
+    def update(self, instances, validated_data):
+        """Update ``instances`` (aligned with ``validated_data``) in bulk."""
+        resolved = self._resolve(validated_data)
+        fields = set()
+        for instance, item in zip(instances, validated_data):
+            for attr, value in item.items():
+                if attr not in self.related_models:
+                    setattr(instance, attr, value)
+                    fields.add(attr)
+        if fields:
+            Recipe.objects.bulk_update(instances, fields)
+
+        for field_name, objs in resolved.items():
+            wanted = {
+                instance.id: [objs[attr["name"]].id for attr in item[field_name]]
+                for instance, item in zip(instances, validated_data)
+                if item.get(field_name) is not None
+            }
+            if wanted:
+                Recipe.objects.set_related(field_name, wanted)
+        refresh_signatures([
+            instance.id for instance, item in zip(instances, validated_data)
+            if any(item.get(name) is not None for name in self.related_models)
+        ])
+        return instances
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     """Serializer for recipes."""
     tags = TagSerializer(many=True, required=False)
     ingredients = IngredientSerializer(many=True, required=False)
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = [
             'id', 'title', 'time_minutes', 'price', 'link', 'tags',
-            'ingredients',
+            'ingredients', 'image_variants',
         ]
         read_only_fields = ['id']
+        list_serializer_class = RecipeListSerializer
+
+    @extend_schema_field({
+        "type": "object",
+        "additionalProperties": {"type": "string", "format": "uri"},
+    })
+    def get_image_variants(self, obj):
+        """Return the URLs of the resized images rendered so far."""
+        request = self.context.get('request')
+        urls = {}
+        for variant, name in obj.image_variants.items():
+            url = default_storage.url(name)
+            urls[variant] = request.build_absolute_uri(url) \
+                if request is not None else url
+        return urls
 
-    def _get_or_create_tags(self, tags, recipe):
+    def _get_or_create_tags(self, tags):
         """Handle getting or creating tags as needed."""
         auth_user = self.context['request'].user
-        for tag in tags:
-            tag_obj, created = Tag.objects.get_or_create(
-                user=auth_user,
-                **tag,
-            )
-            recipe.tags.add(tag_obj)
+        return Tag.objects.get_or_create_many(
+            auth_user, [tag["name"] for tag in tags])
 
-    def _get_or_create_ingredients(self, ingredients, recipe):
+    def _get_or_create_ingredients(self, ingredients):
         """Handle getting or creating ingredients as needed."""
         auth_user = self.context['request'].user
-        for ingredient in ingredients:
-            ingredient_obj, created = Ingredient.objects.get_or_create(
-                user=auth_user,
-                **ingredient,
-            )
-            recipe.ingredients.add(ingredient_obj)
+        return Ingredient.objects.get_or_create_many(
+            auth_user, [ingredient["name"] for ingredient in ingredients])
 
     def create(self, validated_data):
         """Create a recipe"""
-        tags = validated_data.pop("tags", [])
-        ingredients = validated_data.pop("ingredients", [])
-        recipe = Recipe.objects.create(**validated_data)
-        self._get_or_create_tags(tags, recipe)
-        self._get_or_create_ingredients(ingredients, recipe)
+        tag_ids = [
+            tag.id for tag in self._get_or_create_tags(
+                validated_data.pop("tags", []))
+        ]
+        ingredient_ids = [
+            ingredient.id for ingredient in self._get_or_create_ingredients(
+                validated_data.pop("ingredients", []))
+        ]
+        recipe = Recipe.objects.create(
+            similarity_signature=signature(tag_ids, ingredient_ids),
+            **validated_data,
+        )
+        Recipe.objects.add_related("tags", [
+            (recipe.id, tag_id) for tag_id in tag_ids
+        ])
+        Recipe.objects.add_related("ingredients", [
+            (recipe.id, ingredient_id) for ingredient_id in ingredient_ids
+        ])
         return recipe
 
     def update(self, instance, validated_data):
         """Update recipe."""
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop("ingredients", None)
+        related = {}
         if tags is not None:
-            instance.tags.clear()
-            self._get_or_create_tags(tags, instance)
+            related["tags"] = [
+                tag.id for tag in self._get_or_create_tags(tags)]
+            Recipe.objects.set_related("tags", {instance.id: related["tags"]})
 
         if ingredients is not None:
-            instance.ingredients.clear()
-            self._get_or_create_ingredients(ingredients, instance)
+            related["ingredients"] = [
+                ingredient.id
+                for ingredient in self._get_or_create_ingredients(ingredients)
+            ]
+            Recipe.objects.set_related("ingredients", {
+                instance.id: related["ingredients"],
+            })
+
+        if len(related) == 2:
+            instance.similarity_signature = signature(
+                related["tags"], related["ingredients"])
+        elif related:
+            # Only one of the sets was given, the other one is in the
+            # database.
+            refresh_signatures([instance.id])
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -95,8 +212,42 @@ class RecipeDetailSerializer(RecipeSerializer):
         fields = RecipeSerializer.Meta.fields + ['description', 'image']
 
 
+class CookableRecipeSerializer(RecipeSerializer):
+    """Serializer for recipes matched against a pantry of ingredients."""
+    matched = serializers.IntegerField(read_only=True)
+    missing = serializers.IntegerField(read_only=True)
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ['matched', 'missing']
+
+
+class SimilarRecipeSerializer(RecipeSerializer):
+    """Serializer for recipes similar to another one."""
+    similarity = serializers.FloatField(read_only=True)
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ['similarity']
+
+
+class HeaderImageField(serializers.ImageField):
+    """
+    Image field that trusts the header check of CappedImageUploadHandler
+    instead of opening the whole file with Pillow again.
+    """
+
+    def to_internal_value(self, data):
+        if getattr(data, "image_format", None) is None:
+            return super().to_internal_value(data)
+        return serializers.FileField.to_internal_value(self, data)
+
+
 class RecipeImageSerializer(serializers.ModelSerializer):
     """Serializer for uploading image API."""
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.ImageField: HeaderImageField,
+    }
+
     class Meta:
         model = Recipe
         fields = ["id", "image"]
@@ -106,3 +257,17 @@ class RecipeImageSerializer(serializers.ModelSerializer):
                 "required": True,
             }
         }
+
+    def update(self, instance, validated_data):
+        """Swap the image, sharing stored content when enabled."""
+        previous = instance.image.name
+        previous_variants = list(instance.image_variants.values())
+        with transaction.atomic():
+            image = validated_data["image"]
+            if settings.RECIPE_IMAGE_CONTENT_ADDRESSED and getattr(
+                    image, "content_digest", None):
+                validated_data["image"] = store_image(image)
+            instance = super().update(instance, validated_data)
+            if previous:
+                release_image(previous, previous_variants)
+        return instance
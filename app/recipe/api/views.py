@@ -1,13 +1,37 @@
 """
 View classes for Recipe API
 """
+import csv
+import itertools
+import json
+from collections import Counter
+
 from recipe.api.serializers import (
-    RecipeSerializer, RecipeDetailSerializer,
+    RecipeSerializer, RecipeDetailSerializer, SimilarRecipeSerializer,
+    CookableRecipeSerializer,
     TagSerializer, IngredientSerializer, RecipeImageSerializer)
-from rest_framework.authentication import TokenAuthentication
+from recipe.api.filters import (
+    filter_assigned_only, filter_by_range, filter_by_related, filter_cookable,
+    filter_search, filter_typeahead, params_to_limit)
+from recipe.api.mixins import LibraryVersionMixin
+from recipe.api.pagination import (
+    RecipeCursorPagination, NameCursorPagination)
+from core.authentication import CachedTokenAuthentication
+from core.images import schedule_variants
+from core.similarity import similar_recipes
+from core.uploads import CappedImageUploadHandler
 from rest_framework.permissions import IsAuthenticated
 from core.models import Recipe, Tag, Ingredient
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from drf_spectacular.utils import (
+    extend_schema_view, extend_schema, OpenApiParameter, OpenApiTypes)
+from django.utils.translation import gettext as _
 from rest_framework import viewsets, mixins, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
@@ -15,23 +39,81 @@ from rest_framework.response import Response
 # Create your views here.
 
 
-class BaseRecipeAttrViewSet(mixins.ListModelMixin,
+class _Echo:
+    """File-like object that returns written rows instead of storing them."""
+
+    def write(self, value):
+        return value
+
+
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "assigned_only",
+                OpenApiTypes.INT,
+                enum=[0, 1],
+                description="Filter by items assigned to recipes.",
+            ),
+            OpenApiParameter(
+                "q",
+                OpenApiTypes.STR,
+                description="Typeahead: the best matching names, prefix "
+                            "matches first, as a single page.",
+            ),
+            OpenApiParameter(
+                "limit",
+                OpenApiTypes.INT,
+                description="Number of typeahead suggestions, 10 by default.",
+            ),
+        ]
+    )
+)
+class BaseRecipeAttrViewSet(LibraryVersionMixin,
+                            mixins.ListModelMixin,
                             mixins.UpdateModelMixin,
                             mixins.DestroyModelMixin,
                             viewsets.GenericViewSet):
     """Base viewset for recipe attributes"""
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = NameCursorPagination
 
     def get_queryset(self):
         """Fitler queryset to authenticated users"""
-        return self.queryset.filter(user=self.request.user).order_by("-name")
+        queryset = filter_assigned_only(
+            self.queryset.filter(user=self.request.user),
+            self.recipe_field,
+            self.request.query_params,
+        ).order_by("-name")
+        if self.action == "list":
+            queryset = filter_typeahead(queryset, self.request.query_params)
+        return queryset
+
+    def perform_update(self, serializer):
+        """Reject renaming onto a name the user already has."""
+        try:
+            with transaction.atomic():
+                super().perform_update(serializer)
+        except IntegrityError:
+            msg = _("You already have an item with this name.")
+            raise ValidationError({"name": [msg]})
+
+    def perform_destroy(self, instance):
+        """
+        Mark the similarity signatures of recipes losing ``instance`` as
+        stale in one query, they are recomputed on next use.
+        """
+        Recipe.objects.filter(**{self.recipe_field: instance}).update(
+            similarity_signature=None)
+        super().perform_destroy(instance)
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
     """Manage tags in the database"""
     serializer_class = TagSerializer
     queryset = Tag.objects.all()
+    recipe_field = "tags"
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
@@ -39,38 +121,371 @@ class IngredientViewSet(BaseRecipeAttrViewSet):
 
     serializer_class = IngredientSerializer
     queryset = Ingredient.objects.all()
+    recipe_field = "ingredients"
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "tags",
+                OpenApiTypes.STR,
+                description="Comma separated list of tag IDs to filter",
+            ),
+            OpenApiParameter(
+                "ingredients",
+                OpenApiTypes.STR,
+                description="Comma separated list of ingredient IDs to filter",
+            ),
+            OpenApiParameter(
+                "match",
+                OpenApiTypes.STR,
+                enum=["any", "all"],
+                description="Require any (default) or all of the given IDs",
+            ),
+            OpenApiParameter(
+                "search",
+                OpenApiTypes.STR,
+                description="Full text search in titles and descriptions, "
+                            "best matches first",
+            ),
+            OpenApiParameter(
+                "max_time",
+                OpenApiTypes.INT,
+                description="Only recipes taking at most this many minutes",
+            ),
+            OpenApiParameter(
+                "min_price",
+                OpenApiTypes.DECIMAL,
+                description="Only recipes costing at least this much",
+            ),
+            OpenApiParameter(
+                "max_price",
+                OpenApiTypes.DECIMAL,
+                description="Only recipes costing at most this much",
+            ),
+            OpenApiParameter(
+                "ordering",
+                OpenApiTypes.STR,
+                enum=["-id", "id", "time_minutes", "-time_minutes",
+                      "price", "-price"],
+                description="Sort order, newest first (-id) by default; "
+                            "ignored when searching",
+            ),
+        ]
+    )
+)
+class RecipeViewSet(LibraryVersionMixin, viewsets.ModelViewSet):
     """View for manage recipe APIs."""
     serializer_class = RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    pagination_class = RecipeCursorPagination
+    bulk_max_items = 1000
+    export_chunk_size = 2000
+    export_csv_fields = [
+        "id", "title", "description", "time_minutes", "price", "link",
+        "image", "tags", "ingredients",
+    ]
 
     def get_queryset(self):
         """Retrieve recipes for authenticated user."""
-        return self.queryset.filter(user=self.request.user).order_by("-id")
+        queryset = self.queryset.filter(user=self.request.user)
+        if self.action in ("list", "retrieve", "similar", "cookable"):
+            # Nested tag/ingredient serializers would otherwise issue two
+            # queries per recipe. Writes reload the relations after saving,
+            # so prefetching them up front would be wasted.
+            queryset = queryset.prefetch_related("tags", "ingredients")
+        if self.action == "list":
+            queryset = filter_by_related(queryset, self.request.query_params)
+            queryset = filter_by_range(queryset, self.request.query_params)
+            queryset = filter_search(queryset, self.request.query_params)
+        return queryset.order_by("-id")
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(request, super().retrieve, *args, **kwargs)
 
     def get_serializer_class(self):
         if self.action == "list":
             return RecipeSerializer
         elif self.action == "upload_image":
             return RecipeImageSerializer
+        elif self.action == "similar":
+            return SimilarRecipeSerializer
+        elif self.action == "cookable":
+            return CookableRecipeSerializer
 
         return self.serializer_class
 
     def perform_create(self, serializer):
         """Create a new recipe"""
         serializer.save(user=self.request.user)
+        self._bump_version()
 
     @action(methods=["POST"], detail=True, url_path="upload-image")
     def upload_image(self, request, pk=None):
         """Upload an image to recipe"""
+        handler = CappedImageUploadHandler(request)
+        request.upload_handlers = [handler]
         recipe = self.get_object()
-        serializer = self.get_serializer(recipe, data=request.data)
+        data = request.data
+        if handler.error:
+            return Response({"image": [handler.error]},
+                            status.HTTP_400_BAD_REQUEST)
+        serializer = self.get_serializer(recipe, data=data)
 
         if serializer.is_valid():
-            serializer.save()
+            # The variants of the previous image no longer apply, new ones
+            # are rendered in the background once this is committed.
+            recipe = serializer.save(image_variants={})
+            schedule_variants(recipe)
+            self._bump_version()
             return Response(serializer.data, status.HTTP_200_OK)
         return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    def _bulk_response(self, ids, status_code):
+        """Serialize the recipes ``ids`` in order with prefetched relations."""
+        recipes = self.get_queryset().prefetch_related(
+            "tags", "ingredients").in_bulk(ids)
+        serializer = self.get_serializer(
+            [recipes[recipe_id] for recipe_id in ids], many=True)
+        return Response(serializer.data, status_code)
+
+    @action(methods=["POST", "PATCH", "DELETE"], detail=False, url_path="bulk")
+    def bulk(self, request):
+        """
+        Create (POST), partially update (PATCH, items need an ``id``) or
+        delete (DELETE, ``{"ids": [...]}``) many recipes in one transaction.
+        Validation errors are returned per item and nothing is written.
+        """
+        if request.method == "DELETE":
+            ids = request.data.get("ids") if isinstance(
+                request.data, dict) else None
+            # JSON true and false would pass as the ids 1 and 0.
+            if not isinstance(ids, list) or not all(
+                    type(recipe_id) is int for recipe_id in ids):
+                msg = _("Expected a list of recipe ids.")
+                return Response({"ids": [msg]}, status.HTTP_400_BAD_REQUEST)
+            if len(ids) > self.bulk_max_items:
+                msg = _("At most %d recipes per request.") % \
+                    self.bulk_max_items
+                return Response({"ids": [msg]}, status.HTTP_400_BAD_REQUEST)
+            with transaction.atomic():
+                _total, deleted = self.get_queryset().filter(
+                    id__in=ids).delete()
+                self._bump_version()
+            return Response({"deleted": deleted.get(Recipe._meta.label, 0)},
+                            status.HTTP_200_OK)
+
+        if not isinstance(request.data, list):
+            msg = _("Expected a list of recipes.")
+            return Response({"non_field_errors": [msg]},
+                            status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > self.bulk_max_items:
+            msg = _("At most %d recipes per request.") % self.bulk_max_items
+            return Response({"non_field_errors": [msg]},
+                            status.HTTP_400_BAD_REQUEST)
+
+        instances = None
+        if request.method == "PATCH":
+            ids = [item.get("id") if isinstance(item, dict) else None
+                   for item in request.data]
+            # bool is an int subclass, true would otherwise stand for 1.
+            ids = [recipe_id if type(recipe_id) is int else None
+                   for recipe_id in ids]
+            found = self.get_queryset().in_bulk(
+                [recipe_id for recipe_id in ids if recipe_id is not None])
+            counts = Counter(ids)
+            errors = [
+                {} if recipe_id in found and counts[recipe_id] == 1
+                else {"id": [_("Unknown or duplicate recipe id.")]}
+                for recipe_id in ids
+            ]
+            if any(errors):
+                return Response(errors, status.HTTP_400_BAD_REQUEST)
+            instances = [found[recipe_id] for recipe_id in ids]
+
+        serializer = self.get_serializer(
+            instances, data=request.data, many=True,
+            partial=request.method == "PATCH")
+        if not serializer.is_valid():
+            return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            if instances is None:
+                recipes = serializer.save(user=self.request.user)
+            else:
+                recipes = serializer.save()
+            self._bump_version()
+
+        status_code = status.HTTP_201_CREATED \
+            if instances is None else status.HTTP_200_OK
+        return self._bulk_response(
+            [recipe.id for recipe in recipes], status_code)
+
+    def _export_recipes(self):
+        """
+        Yield the user's recipes by id, one keyset page of
+        ``export_chunk_size`` at a time so memory stays flat. Unlike a
+        chunked iterator this needs no server-side cursor, which
+        transaction pooling disables.
+        """
+        queryset = self.get_queryset().prefetch_related(
+            "tags", "ingredients").order_by("id")
+        last_id = 0
+        while True:
+            page = list(queryset.filter(
+                id__gt=last_id)[:self.export_chunk_size])
+            yield from page
+            if len(page) < self.export_chunk_size:
+                return
+            last_id = page[-1].id
+
+    def _export_rows(self, file_format):
+        """Yield the user's recipes encoded as NDJSON or CSV lines."""
+        recipes = self._export_recipes()
+        serializer = RecipeDetailSerializer(context=self.get_serializer_context())
+
+        if file_format == "csv":
+            writer = csv.DictWriter(
+                _Echo(), self.export_csv_fields, extrasaction="ignore")
+            yield writer.writeheader()
+            for recipe in recipes:
+                row = serializer.to_representation(recipe)
+                for field_name in ["tags", "ingredients"]:
+                    row[field_name] = "|".join(
+                        item["name"] for item in row[field_name])
+                yield writer.writerow(row)
+        else:
+            for recipe in recipes:
+                yield json.dumps(serializer.to_representation(recipe)) + "\n"
+
+    async def _aexport_rows(self, file_format):
+        """
+        Async version of ``_export_rows`` for ASGI, which collects sync
+        iterators into a list before sending them. Lines are encoded a
+        chunk at a time in the sync thread.
+        """
+        rows = self._export_rows(file_format)
+        take = sync_to_async(
+            lambda: list(itertools.islice(rows, self.export_chunk_size)))
+        while chunk := await take():
+            for line in chunk:
+                yield line
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "file_format",
+                OpenApiTypes.STR,
+                enum=["ndjson", "csv"],
+                description="Export format, ndjson by default",
+            ),
+        ],
+        responses={200: OpenApiTypes.BINARY},
+    )
+    @action(methods=["GET"], detail=False, url_path="export")
+    def export(self, request):
+        """Stream the user's whole recipe library as NDJSON or CSV."""
+        file_format = request.query_params.get("file_format", "ndjson")
+        content_types = {
+            "ndjson": "application/x-ndjson",
+            "csv": "text/csv",
+        }
+        if file_format not in content_types:
+            msg = _("Expected one of: ndjson, csv.")
+            return Response({"file_format": [msg]},
+                            status.HTTP_400_BAD_REQUEST)
+
+        if isinstance(request._request, ASGIRequest):
+            rows = self._aexport_rows(file_format)
+        else:
+            rows = self._export_rows(file_format)
+        response = StreamingHttpResponse(
+            rows, content_type=content_types[file_format])
+        response["Content-Disposition"] = \
+            f'attachment; filename="recipes.{file_format}"'
+        return response
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "limit",
+                OpenApiTypes.INT,
+                description="Number of similar recipes, 10 by default.",
+            ),
+        ],
+        responses=SimilarRecipeSerializer(many=True),
+    )
+    @action(methods=["GET"], detail=True, url_path="similar")
+    def similar(self, request, pk=None):
+        """
+        List the user's recipes sharing the most tags and ingredients with
+        this one, by estimated Jaccard similarity.
+        """
+        return self._conditional(request, self._similar)
+
+    def _similar(self, request):
+        recipe = self.get_object()
+        limit = params_to_limit(
+            request.query_params,
+            settings.RECIPE_SIMILAR_LIMIT,
+            settings.RECIPE_SIMILAR_MAX_LIMIT,
+        )
+        scores = similar_recipes(recipe, limit)
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, score in scores])
+        similar = []
+        for recipe_id, score in scores:
+            if recipe_id in recipes:
+                recipes[recipe_id].similarity = round(score, 3)
+                similar.append(recipes[recipe_id])
+        serializer = self.get_serializer(similar, many=True)
+        return Response(serializer.data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "have",
+                OpenApiTypes.STR,
+                description="Comma separated list of ingredient IDs you have",
+            ),
+            OpenApiParameter(
+                "have_names",
+                OpenApiTypes.STR,
+                description="Comma separated list of ingredient names you "
+                            "have, case insensitive",
+            ),
+            OpenApiParameter(
+                "max_missing",
+                OpenApiTypes.INT,
+                description="Only recipes missing at most this many "
+                            "ingredients, 0 for fully cookable ones",
+            ),
+            OpenApiParameter(
+                "limit",
+                OpenApiTypes.INT,
+                description="Number of recipes, 20 by default.",
+            ),
+        ],
+        responses=CookableRecipeSerializer(many=True),
+    )
+    @action(methods=["GET"], detail=False, url_path="cookable")
+    def cookable(self, request):
+        """
+        List the user's recipes using ingredients they have, those with
+        nothing missing first, then by fewest missing ingredients.
+        """
+        return self._conditional(request, self._cookable)
+
+    def _cookable(self, request):
+        limit = params_to_limit(
+            request.query_params,
+            settings.RECIPE_COOKABLE_LIMIT,
+            settings.RECIPE_COOKABLE_MAX_LIMIT,
+        )
+        queryset = filter_cookable(
+            self.get_queryset(), request.user, request.query_params)
+        serializer = self.get_serializer(queryset[:limit], many=True)
+        return Response(serializer.data)
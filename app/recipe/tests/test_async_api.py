@@ -0,0 +1,141 @@
+"""
+Tests for the async read endpoints.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+
+RECIPES_URL = reverse("recipe:async-recipe-list")
+TAGS_URL = reverse("recipe:async-tag-list")
+
+
+def detail_url(recipe_id):
+    """Create and return an async recipe detail URL."""
+    return reverse("recipe:async-recipe-detail", args=[recipe_id])
+
+
+def create_recipe(user, **kwargs):
+    """Create and return a sample recipe."""
+    defaults = {
+        "title": "Sample recipe",
+        "time_minutes": 22,
+        "price": Decimal("5.25"),
+    }
+    defaults.update(kwargs)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class AsyncRecipeAPITests(TestCase):
+    """Test the async recipe, tag and ingredient endpoints."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        token = Token.objects.create(user=self.user)
+        self.headers = {"authorization": f"Token {token.key}"}
+
+    async def test_auth_required(self):
+        """Test requests without a valid token are rejected"""
+        res = await self.async_client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, 401)
+
+        res = await self.async_client.get(
+            RECIPES_URL, headers={"authorization": "Token invalid"})
+        self.assertEqual(res.status_code, 401)
+
+    def test_list_matches_sync_endpoint(self):
+        """Test the async list returns the same recipes as the viewset"""
+        for i in range(3):
+            recipe = create_recipe(self.user, title=f"Recipe {i}")
+            recipe.tags.add(Tag.objects.create(user=self.user, name=f"T{i}"))
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        expected = client.get(reverse("recipe:recipe-list")).json()
+        # Token, version, recipes, tags and ingredients.
+        with self.assertNumQueries(5):
+            res = self.client.get(RECIPES_URL, headers=self.headers)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["results"], expected["results"])
+
+    async def test_list_pagination(self):
+        """Test pages are linked by a before cursor"""
+        for i in range(3):
+            await Recipe.objects.acreate(
+                user=self.user, title=f"Recipe {i}", time_minutes=5,
+                price=Decimal("1.00"))
+
+        res = await self.async_client.get(
+            RECIPES_URL, {"page_size": 2}, headers=self.headers)
+        data = res.json()
+        self.assertEqual(len(data["results"]), 2)
+
+        res = await self.async_client.get(data["next"], headers=self.headers)
+        data = res.json()
+        self.assertEqual([r["title"] for r in data["results"]], ["Recipe 0"])
+        self.assertIsNone(data["next"])
+
+    async def test_list_invalid_filter(self):
+        """Test invalid filter ids are rejected"""
+        res = await self.async_client.get(
+            RECIPES_URL, {"tags": "1,abc"}, headers=self.headers)
+
+        self.assertEqual(res.status_code, 400)
+
+    async def test_detail_limited_to_user(self):
+        """Test another user's recipe is not found"""
+        other = await get_user_model().objects.acreate(
+            email="other@example.com")
+        recipe = await Recipe.objects.acreate(
+            user=other, title="Other", time_minutes=5, price=Decimal("1.00"))
+
+        res = await self.async_client.get(
+            detail_url(recipe.id), headers=self.headers)
+
+        self.assertEqual(res.status_code, 404)
+
+    async def test_detail_not_modified(self):
+        """Test a matching ETag is answered with 304"""
+        recipe = await Recipe.objects.acreate(
+            user=self.user, title="Soup", time_minutes=5,
+            price=Decimal("1.00"))
+        url = detail_url(recipe.id)
+
+        res = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(res.json()["title"], "Soup")
+        res = await self.async_client.get(url, headers={
+            **self.headers, "if-none-match": res["ETag"]})
+
+        self.assertEqual(res.status_code, 304)
+
+    async def test_write_not_allowed(self):
+        """Test the async endpoints are read only"""
+        res = await self.async_client.post(RECIPES_URL, headers=self.headers)
+
+        self.assertEqual(res.status_code, 405)
+
+    async def test_tags_assigned_only(self):
+        """Test tags can be limited to the ones used by recipes"""
+        recipe = await Recipe.objects.acreate(
+            user=self.user, title="Soup", time_minutes=5,
+            price=Decimal("1.00"))
+        tag = await Tag.objects.acreate(user=self.user, name="Dinner")
+        await Tag.objects.acreate(user=self.user, name="Lunch")
+        await recipe.tags.aadd(tag)
+
+        res = await self.async_client.get(
+            TAGS_URL, {"assigned_only": 1}, headers=self.headers)
+
+        self.assertEqual(res.json()["results"], [
+            {"id": tag.id, "name": "Dinner"},
+        ])
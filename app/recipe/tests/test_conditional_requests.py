@@ -0,0 +1,116 @@
+"""
+Tests for ETag / Last-Modified handling of the recipe API.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+
+RECIPES_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+def create_recipe(user, **kwargs):
+    """Create and return a sample recipe."""
+    defaults = {
+        "title": "Test Title",
+        "time_minutes": 5,
+        "price": Decimal("2.99"),
+    }
+    defaults.update(kwargs)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalRequestTests(TestCase):
+    """Test conditional GETs on recipe endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_not_modified_skips_recipe_queries(self):
+        """Test a matching ETag returns 304 after one version lookup"""
+        create_recipe(user=self.user)
+        res = self.client.get(RECIPES_URL)
+        etag = res["ETag"]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+    def test_write_changes_etag(self):
+        """Test creating a recipe through the API changes the ETag"""
+        res = self.client.get(RECIPES_URL)
+        etag = res["ETag"]
+        payload = {
+            "title": "Sample recipe",
+            "time_minutes": 30,
+            "price": Decimal("5.99"),
+        }
+        self.client.post(RECIPES_URL, payload)
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_tag_update_changes_etag(self):
+        """Test renaming a tag invalidates the tag list ETag"""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        res = self.client.get(TAGS_URL)
+        etag = res["ETag"]
+
+        url = reverse("recipe:tag-detail", args=[tag.id])
+        self.client.patch(url, {"name": "Dessert"})
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["name"], "Dessert")
+
+    def test_if_modified_since(self):
+        """Test Last-Modified is honoured after the first write"""
+        payload = {
+            "title": "Sample recipe",
+            "time_minutes": 30,
+            "price": Decimal("5.99"),
+        }
+        res = self.client.post(RECIPES_URL, payload)
+        url = reverse("recipe:recipe-detail", args=[res.data["id"]])
+        res = self.client.get(url)
+
+        res = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=res["Last-Modified"])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            },
+        },
+        RECIPE_API_RESPONSE_CACHE={"CACHE_ALIAS": "default", "TIMEOUT": 60},
+    )
+    def test_list_body_cached(self):
+        """Test list bodies are served from the cache for a version"""
+        create_recipe(user=self.user)
+        first = self.client.get(RECIPES_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, first.data)
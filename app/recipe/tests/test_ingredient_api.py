@@ -7,15 +7,19 @@ URLS:
 # Private Tests: Authenticated requests
 """
 
+from decimal import Decimal
+from unittest import skipUnless
+
 from django.contrib.auth import get_user_model
 
 from django.urls import reverse
+from django.db import connection
 from django.test import TestCase
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Ingredient
+from core.models import Ingredient, Recipe
 from recipe.api.serializers import IngredientSerializer
 
 INGREDIENTS_URL = reverse("recipe:ingredient-list")
@@ -64,8 +68,8 @@ class PrivateIngredientsAPITests(TestCase):
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 2)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_ingredients_limited_to_user(self):
         """Test retrieve ingredients limited for current user"""
@@ -78,9 +82,9 @@ class PrivateIngredientsAPITests(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0].get("name"), ingredient.name)
-        self.assertEqual(res.data[0].get("id"), ingredient.id)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0].get("name"), ingredient.name)
+        self.assertEqual(res.data["results"][0].get("id"), ingredient.id)
 
     def test_update_ingredient(self):
         """Test updating an ingredient"""
@@ -156,3 +160,68 @@ class PrivateIngredientsAPITests(TestCase):
         is_exist = Ingredient.objects.filter(
             user=other_user, name="Test 2").exists()
         self.assertTrue(is_exist)
+
+    def test_filter_ingredients_assigned_to_recipes(self):
+        """Test listing ingredients by those assigned to recipes."""
+        ingredient1 = Ingredient.objects.create(user=self.user, name="Apples")
+        ingredient2 = Ingredient.objects.create(user=self.user, name="Turkey")
+        recipe = Recipe.objects.create(
+            title="Apple Crumble",
+            time_minutes=5,
+            price=Decimal("4.50"),
+            user=self.user,
+        )
+        recipe.ingredients.add(ingredient1)
+        other = Recipe.objects.create(
+            title="Apple Pie",
+            time_minutes=50,
+            price=Decimal("6.50"),
+            user=self.user,
+        )
+        other.ingredients.add(ingredient1)
+
+        res = self.client.get(INGREDIENTS_URL, {"assigned_only": 1})
+
+        names = [item["name"] for item in res.data["results"]]
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(names, [ingredient1.name])
+        self.assertNotIn(ingredient2.name, names)
+
+    def test_typeahead(self):
+        """Test q suggests prefix matches first, limited to limit."""
+        for name in ["Salt", "Sea salt", "Salmon", "Pepper", "Basil"]:
+            Ingredient.objects.create(user=self.user, name=name)
+
+        res = self.client.get(INGREDIENTS_URL, {"q": "sal", "limit": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [item["name"] for item in res.data["results"]]
+        self.assertEqual(names, ["Salmon", "Salt"])
+        self.assertIsNone(res.data["next"])
+
+    def test_typeahead_substring_after_prefix(self):
+        """Test names containing q follow the prefix matches."""
+        for name in ["Sea salt", "Salt", "Pepper"]:
+            Ingredient.objects.create(user=self.user, name=name)
+
+        res = self.client.get(INGREDIENTS_URL, {"q": "salt"})
+
+        names = [item["name"] for item in res.data["results"]]
+        self.assertEqual(names, ["Salt", "Sea salt"])
+
+    def test_typeahead_invalid_limit(self):
+        """Test a non numeric limit is rejected."""
+        res = self.client.get(INGREDIENTS_URL, {"q": "sal", "limit": "x"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(connection.vendor == "postgresql", "needs PostgreSQL")
+    def test_typeahead_fuzzy(self):
+        """Test misspelled words still suggest similar names."""
+        Ingredient.objects.create(user=self.user, name="Cherry tomato")
+        Ingredient.objects.create(user=self.user, name="Potato")
+
+        res = self.client.get(INGREDIENTS_URL, {"q": "tomatoe"})
+
+        names = [item["name"] for item in res.data["results"]]
+        self.assertEqual(names[0], "Cherry tomato")
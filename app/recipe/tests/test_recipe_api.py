@@ -7,24 +7,42 @@ URLS:
 # Private Tests: Authenticated requests
 """
 
-from django.test import TestCase
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopUpload
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework import status
 from decimal import Decimal
 
-from core.models import Recipe, Tag, Ingredient
+from core.models import Recipe, Tag, Ingredient, ImageBlob
+from core.images import render_variants
+from core.uploads import CappedImageUploadHandler
 
 from recipe.api.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe.api.views import RecipeViewSet
 from django.db.utils import IntegrityError
+import csv
+import io
+import json
 import tempfile
 import os
+import struct
+import zlib
+from unittest import skipUnless
+from unittest.mock import patch
 
 from PIL import Image
 
 
 RECIPES_URL = reverse("recipe:recipe-list")
+EXPORT_URL = reverse("recipe:recipe-export")
+COOKABLE_URL = reverse("recipe:recipe-cookable")
 
 
 def detail_url(recipe_id):
@@ -32,6 +50,11 @@ def detail_url(recipe_id):
     return reverse("recipe:recipe-detail", args=[recipe_id, ])
 
 
+def similar_url(recipe_id):
+    """Create and return the similar recipes URL."""
+    return reverse("recipe:recipe-similar", args=[recipe_id, ])
+
+
 def image_upload_url(recipe_id):
     """Create and return image upload URL."""
     return reverse("recipe:recipe-upload-image", args=[recipe_id, ])
@@ -106,7 +129,7 @@ class PrivateRecipeAPITests(TestCase):
         recipes = Recipe.objects.all().order_by("-id")
         serializer = RecipeSerializer(recipes, many=True)
 
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
         self.assertEqual(len(recipes), 3)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
 
@@ -129,9 +152,22 @@ class PrivateRecipeAPITests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
         self.assertEqual(len(recipes), 1)
 
+    def test_recipe_list_paginated(self):
+        """Test recipes are returned newest first one cursor page at a time"""
+        recipes = [create_recipe(user=self.user) for _ in range(5)]
+
+        res = self.client.get(RECIPES_URL, {"page_size": 2})
+        ids = [recipe["id"] for recipe in res.data["results"]]
+        while res.data["next"]:
+            res = self.client.get(res.data["next"])
+            ids += [recipe["id"] for recipe in res.data["results"]]
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(ids, [recipe.id for recipe in reversed(recipes)])
+
     def test_get_recipe_detail(self):
         """Test get recipe detail"""
         recipe = create_recipe(self.user)
@@ -313,6 +349,25 @@ class PrivateRecipeAPITests(TestCase):
         self.assertIn(tag_lunch, recipe.tags.all())
         self.assertNotIn(tag_breakfast, recipe.tags.all())
 
+    def test_update_recipe_tags_keeps_unchanged_rows(self):
+        """Test updating tags only writes the through rows that change."""
+        tag_breakfast = Tag.objects.create(user=self.user, name='Breakfast')
+        tag_lunch = Tag.objects.create(user=self.user, name='Lunch')
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(tag_breakfast, tag_lunch)
+        kept_row = Recipe.tags.through.objects.get(
+            recipe=recipe, tag=tag_breakfast)
+
+        payload = {'tags': [{'name': 'Breakfast'}, {'name': 'Dinner'}]}
+        url = detail_url(recipe.id)
+        res = self.client.patch(url, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = sorted(tag.name for tag in recipe.tags.all())
+        self.assertEqual(names, ['Breakfast', 'Dinner'])
+        self.assertTrue(
+            Recipe.tags.through.objects.filter(id=kept_row.id).exists())
+
     def test_clear_recipe_tags(self):
         """Test clearing a recipes tags."""
         tag = Tag.objects.create(user=self.user, name='Dessert')
@@ -417,7 +472,171 @@ class PrivateRecipeAPITests(TestCase):
         self.assertNotIn(ingredient, recipe.ingredients.all())
         self.assertEqual(recipe.ingredients.count(), 0)
 
+    def test_filter_by_tags(self):
+        """Test filtering recipes by any of the given tags."""
+        r1 = create_recipe(user=self.user, title='Thai Vegetable Curry')
+        r2 = create_recipe(user=self.user, title='Aubergine with Tahini')
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Vegetarian')
+        r1.tags.add(tag1)
+        r2.tags.add(tag2)
+        r3 = create_recipe(user=self.user, title='Fish and chips')
+
+        params = {'tags': f'{tag1.id},{tag2.id}'}
+        res = self.client.get(RECIPES_URL, params)
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(ids), [r1.id, r2.id])
+        self.assertNotIn(r3.id, ids)
+
+    def test_filter_by_all_tags(self):
+        """Test filtering recipes that have all of the given tags."""
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Quick')
+        r1 = create_recipe(user=self.user, title='Salad')
+        r1.tags.add(tag1, tag2)
+        r2 = create_recipe(user=self.user, title='Stew')
+        r2.tags.add(tag1)
+
+        params = {'tags': f'{tag1.id},{tag2.id}', 'match': 'all'}
+        res = self.client.get(RECIPES_URL, params)
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [r1.id])
+
+    def test_filter_by_ingredients(self):
+        """Test filtering recipes by ingredients."""
+        r1 = create_recipe(user=self.user, title='Posh Beans on Toast')
+        r2 = create_recipe(user=self.user, title='Chicken Cacciatore')
+        in1 = Ingredient.objects.create(user=self.user, name='Feta Cheese')
+        in2 = Ingredient.objects.create(user=self.user, name='Chicken')
+        r1.ingredients.add(in1)
+        r2.ingredients.add(in2)
+        create_recipe(user=self.user, title='Red Lentil Daal')
+
+        params = {'ingredients': f'{in1.id}', 'tags': ''}
+        res = self.client.get(RECIPES_URL, params)
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [r1.id])
+
+    def test_filter_invalid_ids(self):
+        """Test non numeric filter ids are rejected."""
+        res = self.client.get(RECIPES_URL, {'tags': '1,abc'})
 
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_title_and_description(self):
+        """Test searching matches titles and descriptions."""
+        r1 = create_recipe(self.user, title="Chicken curry", description="")
+        r2 = create_recipe(self.user, title="Rice",
+                           description="Goes well with chicken")
+        create_recipe(self.user, title="Pancakes", description="Sweet")
+
+        res = self.client.get(RECIPES_URL, {'search': 'chicken'})
+
+        self.assertEqual(
+            {recipe['id'] for recipe in res.data['results']}, {r1.id, r2.id})
+
+    def test_filter_by_time_and_price(self):
+        """Test filtering by maximum time and a price range."""
+        r1 = create_recipe(self.user, time_minutes=10, price=Decimal("4.00"))
+        create_recipe(self.user, time_minutes=45, price=Decimal("4.00"))
+        create_recipe(self.user, time_minutes=10, price=Decimal("12.50"))
+        create_recipe(self.user, time_minutes=5, price=Decimal("1.00"))
+
+        res = self.client.get(RECIPES_URL, {
+            'max_time': '15', 'min_price': '2', 'max_price': '10'})
+
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']], [r1.id])
+
+    def test_filter_invalid_range(self):
+        """Test non numeric range values are rejected."""
+        res = self.client.get(RECIPES_URL, {'max_price': 'cheap'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('max_price', res.data)
+
+    def test_ordering_by_time_paginated(self):
+        """Test ordering by time pages through ties in id order."""
+        recipes = [
+            create_recipe(self.user, time_minutes=minutes)
+            for minutes in [30, 10, 30, 20, 10]
+        ]
+
+        res = self.client.get(
+            RECIPES_URL, {'ordering': 'time_minutes', 'page_size': 2})
+        ids = [recipe['id'] for recipe in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [recipe['id'] for recipe in res.data['results']]
+
+        expected = sorted(recipes, key=lambda r: (r.time_minutes, r.id))
+        self.assertEqual(ids, [recipe.id for recipe in expected])
+
+    def test_ordering_pages_past_many_ties(self):
+        """Test paging by time does not loop over more than 1000 ties."""
+        Recipe.objects.bulk_create([
+            Recipe(user=self.user, title=f"Recipe {i}", time_minutes=30,
+                   price=Decimal("5.00"))
+            for i in range(1100)
+        ])
+        create_recipe(self.user, time_minutes=45)
+
+        res = self.client.get(
+            RECIPES_URL, {'ordering': '-time_minutes', 'page_size': 250})
+        ids = [recipe['id'] for recipe in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [recipe['id'] for recipe in res.data['results']]
+        previous = self.client.get(res.data['previous'])
+
+        expected = list(Recipe.objects.filter(user=self.user).order_by(
+            '-time_minutes', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(
+            [recipe['id'] for recipe in previous.data['results']],
+            expected[750:1000])
+
+    def test_ordering_by_price_descending(self):
+        """Test ordering by descending price."""
+        cheap = create_recipe(self.user, price=Decimal("1.50"))
+        dear = create_recipe(self.user, price=Decimal("20.00"))
+
+        res = self.client.get(RECIPES_URL, {'ordering': '-price'})
+
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [dear.id, cheap.id])
+
+    def test_ordering_unindexed_field_rejected(self):
+        """Test ordering is limited to the indexed columns."""
+        res = self.client.get(RECIPES_URL, {'ordering': 'title'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @skipUnless(connection.vendor == 'postgresql', 'needs PostgreSQL')
+    def test_search_ranked(self):
+        """Test title matches rank above description matches."""
+        create_recipe(self.user, title="Rice",
+                      description="Goes well with chicken")
+        r2 = create_recipe(self.user, title="Chicken curry", description="")
+        create_recipe(self.user, title="Chickens roasted", description="")
+
+        res = self.client.get(RECIPES_URL, {'search': 'chicken', 'page_size': 2})
+        ids = [recipe['id'] for recipe in res.data['results']]
+        res = self.client.get(res.data['next'])
+        ids += [recipe['id'] for recipe in res.data['results']]
+
+        self.assertEqual(len(ids), 3)
+        self.assertIn(r2.id, ids[:2])
+        self.assertEqual(
+            Recipe.objects.get(id=ids[2]).title, "Rice")
+
+
+@override_settings(RECIPE_IMAGE_WORKERS=0)
 class ImageUploadTests(TestCase):
     """Tests for the image upload API"""
 
@@ -431,7 +650,11 @@ class ImageUploadTests(TestCase):
         self.recipe = create_recipe(self.user)
 
     def tearDown(self):
-        self.recipe.image.delete()
+        recipe = Recipe.objects.filter(id=self.recipe.id).first()
+        if recipe is not None:
+            for name in recipe.image_variants.values():
+                default_storage.delete(name)
+            recipe.image.delete()
 
     def test_upload_image(self):
         """Test uploading image"""
@@ -450,6 +673,159 @@ class ImageUploadTests(TestCase):
         self.assertIn("image", res.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    def test_upload_image_renders_variants(self):
+        """Test resized variants without metadata are rendered on commit"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+            img = Image.new("RGB", (2000, 1000))
+            exif = Image.Exif()
+            exif[0x010F] = "Camera"
+            img.save(image_file, format="JPEG", exif=exif)
+            image_file.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(
+                    url, {"image": image_file}, format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        self.assertEqual(
+            set(self.recipe.image_variants), {"thumbnail", "medium"})
+        with default_storage.open(
+                self.recipe.image_variants["thumbnail"]) as f:
+            with Image.open(f) as thumbnail:
+                self.assertEqual(thumbnail.size, (320, 160))
+                self.assertEqual(len(thumbnail.getexif()), 0)
+
+        res = self.client.get(detail_url(self.recipe.id))
+        self.assertTrue(
+            res.data["image_variants"]["thumbnail"].startswith("http"))
+
+    def test_variant_names_change_with_rendering(self):
+        """Test variants rendered differently never reuse a name"""
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+            Image.new("RGB", (800, 400)).save(image_file, format="JPEG")
+            image_file.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(image_upload_url(self.recipe.id),
+                                 {"image": image_file}, format="multipart")
+        self.recipe.refresh_from_db()
+        name = self.recipe.image.name
+        first = render_variants(self.recipe.id, name)
+
+        self.assertEqual(render_variants(self.recipe.id, name), first)
+        Recipe.objects.filter(id=self.recipe.id).update(image_variants={})
+        with self.settings(RECIPE_IMAGE_QUALITY=50):
+            second = render_variants(self.recipe.id, name)
+
+        self.assertIn("_thumbnail_320q80.", first["thumbnail"])
+        self.assertNotEqual(first["thumbnail"], second["thumbnail"])
+        self.assertTrue(default_storage.exists(first["thumbnail"]))
+        for variant_file in second.values():
+            default_storage.delete(variant_file)
+
+    def _upload(self, img, image_format="JPEG"):
+        """Upload ``img`` encoded as ``image_format``."""
+        with tempfile.NamedTemporaryFile(suffix=".img") as image_file:
+            img.save(image_file, format=image_format)
+            image_file.seek(0)
+            return self.client.post(
+                image_upload_url(self.recipe.id),
+                {"image": image_file},
+                format="multipart",
+            )
+
+    @override_settings(RECIPE_IMAGE_MAX_BYTES=1000)
+    def test_upload_image_too_large(self):
+        """Test uploads over the byte cap are rejected"""
+        img = Image.effect_noise((200, 200), 100).convert("RGB")
+        res = self._upload(img)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("bytes", res.data["image"][0])
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_rejected_upload_keeps_connection(self):
+        """Test rejections drain the body instead of resetting the client"""
+        handler = CappedImageUploadHandler()
+
+        with self.assertRaises(StopUpload) as cm:
+            handler._reject("Too large")
+
+        self.assertFalse(cm.exception.connection_reset)
+        self.assertEqual(handler.error, "Too large")
+
+    @override_settings(RECIPE_IMAGE_MAX_PIXELS=100)
+    def test_upload_image_too_many_pixels(self):
+        """Test images declaring too many pixels are rejected"""
+        res = self._upload(Image.new("RGB", (20, 20)), "PNG")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("pixels", res.data["image"][0])
+
+    def test_upload_image_decompression_bomb(self):
+        """Test headers above Pillow's pixel limit are rejected cleanly"""
+        ihdr = b"IHDR" + struct.pack(">IIBBBBB", 20000, 20000, 8, 2, 0, 0, 0)
+        header = b"".join([
+            b"\x89PNG\r\n\x1a\n", struct.pack(">I", 13), ihdr,
+            struct.pack(">I", zlib.crc32(ihdr)),
+            struct.pack(">I", 0), b"IDAT", struct.pack(">I", zlib.crc32(b"IDAT")),
+        ])
+        image_file = SimpleUploadedFile(
+            "bomb.png", header, content_type="image/png")
+
+        res = self.client.post(image_upload_url(self.recipe.id),
+                               {"image": image_file}, format="multipart")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("pixels", res.data["image"][0])
+
+    def test_upload_image_unsupported_format(self):
+        """Test images in formats outside RECIPE_IMAGE_FORMATS are rejected"""
+        res = self._upload(Image.new("RGB", (20, 20)), "GIF")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_replaced_image_deleted(self):
+        """Test the previous image file is deleted after commit"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(Image.new("RGB", (10, 10)))
+        self.recipe.refresh_from_db()
+        old_path = self.recipe.image.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self._upload(Image.new("RGB", (10, 10)))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(os.path.exists(old_path))
+
+    def test_deleted_recipe_image_deleted(self):
+        """Test deleting a recipe deletes its image after commit"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self._upload(Image.new("RGB", (10, 10)))
+        self.recipe.refresh_from_db()
+        path = self.recipe.image.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.delete(detail_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(os.path.exists(path))
+
+    def test_upload_image_not_an_image(self):
+        """Test files without a readable image header are rejected"""
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+            image_file.write(b"not an image" * 100)
+            image_file.seek(0)
+            res = self.client.post(
+                image_upload_url(self.recipe.id),
+                {"image": image_file},
+                format="multipart",
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["image"][0], "Upload a valid image.")
+
     def test_upload_image_bad_request(self):
         """Test uploading invalid image."""
         url = image_upload_url(self.recipe.id)
@@ -459,3 +835,342 @@ class ImageUploadTests(TestCase):
         res = self.client.post(url, payload, format="multipart")
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(RECIPE_IMAGE_CONTENT_ADDRESSED=True, RECIPE_IMAGE_WORKERS=0)
+class ContentAddressedImageTests(TestCase):
+    """Tests for deduplicated image storage."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email="user@example.com",
+                                password="testpass123")
+        self.client.force_authenticate(self.user)
+        self.recipes = [create_recipe(self.user) for _ in range(2)]
+
+    def _upload(self, recipe, color):
+        """Upload a solid ``color`` JPEG to ``recipe``."""
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as image_file:
+            Image.new("RGB", (10, 10), color).save(image_file, format="JPEG")
+            image_file.seek(0)
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(image_upload_url(recipe.id),
+                                       {"image": image_file},
+                                       format="multipart")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe.refresh_from_db()
+        return recipe.image.name
+
+    def test_same_content_stored_once(self):
+        """Test identical uploads share one file until the last is gone"""
+        name = self._upload(self.recipes[0], "red")
+        self.assertEqual(self._upload(self.recipes[1], "red"), name)
+        self.assertEqual(ImageBlob.objects.get(name=name).refcount, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipes[0].delete()
+        self.assertTrue(default_storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipes[1].delete()
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(ImageBlob.objects.exists())
+
+    def test_replaced_image_released(self):
+        """Test replacing an image deletes the no longer used blob"""
+        old = self._upload(self.recipes[0], "red")
+        new = self._upload(self.recipes[0], "blue")
+
+        self.assertNotEqual(old, new)
+        self.assertFalse(default_storage.exists(old))
+        self.assertEqual(
+            list(ImageBlob.objects.values_list("name", flat=True)), [new])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipes[0].delete()
+
+    def test_reupload_before_pending_delete(self):
+        """Test re-uploading content whose file awaits deletion keeps it"""
+        old = self._upload(self.recipes[0], "red")
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.recipes[0].delete()
+
+        new = self._upload(self.recipes[1], "red")
+        for callback in callbacks:
+            callback()
+
+        self.assertNotEqual(old, new)
+        self.assertFalse(default_storage.exists(old))
+        self.assertTrue(default_storage.exists(new))
+        self.assertEqual(ImageBlob.objects.get().name, new)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipes[1].delete()
+
+
+class SimilarRecipeTests(TestCase):
+    """Tests for the similar recipes action."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email="user@example.com",
+                                password="testpass123")
+        self.client.force_authenticate(self.user)
+
+    def _create(self, tags, ingredients):
+        payload = {
+            "title": "Sample",
+            "time_minutes": 10,
+            "price": Decimal("2.50"),
+            "tags": [{"name": name} for name in tags],
+            "ingredients": [{"name": name} for name in ingredients],
+        }
+        res = self.client.post(RECIPES_URL, payload, format="json")
+        return res.data["id"]
+
+    def test_signature_maintained_on_write(self):
+        """Test creating and updating a recipe stores its signature."""
+        recipe_id = self._create(["Dinner"], ["Rice"])
+        created = Recipe.objects.filter(id=recipe_id).values_list(
+            "similarity_signature", flat=True).get()
+
+        self.client.patch(detail_url(recipe_id), {"tags": []}, format="json")
+        updated = Recipe.objects.filter(id=recipe_id).values_list(
+            "similarity_signature", flat=True).get()
+
+        self.assertTrue(created)
+        self.assertTrue(updated)
+        self.assertNotEqual(bytes(created), bytes(updated))
+
+    def test_similar_recipes(self):
+        """Test similar recipes are ranked by shared tags and ingredients."""
+        recipe_id = self._create(["Dinner"], ["Rice", "Chicken"])
+        same_id = self._create(["Dinner"], ["Rice", "Chicken"])
+        close_id = self._create(["Lunch"], ["Rice", "Chicken"])
+        self._create(["Dessert"], ["Sugar"])
+        other_user = create_user(email="other@example.com",
+                                 password="testpass123")
+        create_recipe(user=other_user).tags.add(
+            Tag.objects.create(user=other_user, name="Dinner"))
+
+        res = self.client.get(similar_url(recipe_id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([recipe["id"] for recipe in res.data],
+                         [same_id, close_id])
+        self.assertEqual(res.data[0]["similarity"], 1.0)
+        self.assertLess(res.data[1]["similarity"], 1.0)
+
+    def test_similar_recipes_limit(self):
+        """Test the number of similar recipes can be limited."""
+        recipe_id = self._create(["Dinner"], [])
+        for _ in range(3):
+            self._create(["Dinner"], [])
+
+        res = self.client.get(similar_url(recipe_id), {"limit": 2})
+
+        self.assertEqual(len(res.data), 2)
+
+    def test_deleted_tag_updates_similarity(self):
+        """Test deleting a shared tag stops recipes matching on it."""
+        recipe_id = self._create(["Dinner"], [])
+        self._create(["Dinner"], [])
+        self.client.get(similar_url(recipe_id))
+
+        tag = Tag.objects.get(user=self.user)
+        self.client.delete(reverse("recipe:tag-detail", args=[tag.id]))
+        res = self.client.get(similar_url(recipe_id))
+
+        self.assertEqual(res.data, [])
+
+    def test_user_delete_does_not_scale_with_tags(self):
+        """Test deleting a user removes their tags in bulk."""
+        def delete_user(email, count):
+            user = create_user(email=email, password='test123')
+            Tag.objects.bulk_create([
+                Tag(user=user, name=f"Tag {i}") for i in range(count)])
+            Ingredient.objects.bulk_create([
+                Ingredient(user=user, name=f"Ingredient {i}")
+                for i in range(count)])
+            with CaptureQueriesContext(connection) as queries:
+                user.delete()
+            return len(queries)
+
+        self.assertEqual(
+            delete_user('few@example.com', 2),
+            delete_user('many@example.com', 50))
+
+    def test_similar_other_users_recipe(self):
+        """Test another user's recipe is not found."""
+        other_user = create_user(email="other@example.com",
+                                 password="testpass123")
+        recipe = create_recipe(user=other_user)
+
+        res = self.client.get(similar_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CookableRecipeTests(TestCase):
+    """Tests for matching recipes against a pantry."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email="user@example.com",
+                                password="testpass123")
+        self.client.force_authenticate(self.user)
+        self.ingredients = {
+            name: Ingredient.objects.create(user=self.user, name=name)
+            for name in ["Rice", "Chicken", "Curry", "Sugar", "Flour"]
+        }
+
+    def _recipe(self, *names):
+        recipe = create_recipe(user=self.user)
+        recipe.ingredients.set([self.ingredients[name] for name in names])
+        return recipe
+
+    def _ids(self, *names):
+        return ",".join(str(self.ingredients[name].id) for name in names)
+
+    def test_cookable_ranked_by_missing(self):
+        """Test complete recipes come first, then fewest missing."""
+        two_missing = self._recipe("Rice", "Curry", "Sugar")
+        complete = self._recipe("Rice", "Chicken")
+        one_missing = self._recipe("Rice", "Chicken", "Curry")
+        self._recipe("Sugar", "Flour")
+
+        res = self.client.get(COOKABLE_URL, {"have": self._ids(
+            "Rice", "Chicken")})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(r["id"], r["matched"], r["missing"]) for r in res.data],
+            [(complete.id, 2, 0), (one_missing.id, 2, 1),
+             (two_missing.id, 1, 2)])
+
+    def test_cookable_by_names(self):
+        """Test the pantry can be given as case insensitive names."""
+        recipe = self._recipe("Sugar", "Flour")
+        self._recipe("Rice")
+
+        res = self.client.get(COOKABLE_URL, {"have_names": "sugar, FLOUR"})
+
+        self.assertEqual([r["id"] for r in res.data], [recipe.id])
+        self.assertEqual(res.data[0]["missing"], 0)
+
+    def test_cookable_max_missing(self):
+        """Test recipes missing too many ingredients can be left out."""
+        complete = self._recipe("Rice")
+        self._recipe("Rice", "Chicken")
+
+        res = self.client.get(COOKABLE_URL, {
+            "have": self._ids("Rice"), "max_missing": 0})
+
+        self.assertEqual([r["id"] for r in res.data], [complete.id])
+
+    def test_cookable_limited_to_user(self):
+        """Test other users' recipes and ingredients are ignored."""
+        other_user = create_user(email="other@example.com",
+                                 password="testpass123")
+        rice = Ingredient.objects.create(user=other_user, name="Rice")
+        create_recipe(user=other_user).ingredients.add(rice)
+
+        res = self.client.get(COOKABLE_URL, {
+            "have": str(rice.id), "have_names": "Rice"})
+
+        self.assertEqual(res.data, [])
+
+    def test_cookable_requires_pantry(self):
+        """Test a pantry is required."""
+        res = self.client.get(COOKABLE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cookable_single_query(self):
+        """Test ranking runs as one query besides relation prefetches."""
+        for _ in range(5):
+            self._recipe("Rice", "Chicken", "Curry")
+
+        # Library version, ranked recipes, then tags and ingredients.
+        with self.assertNumQueries(4):
+            res = self.client.get(COOKABLE_URL, {"have": self._ids("Rice")})
+
+        self.assertEqual(len(res.data), 5)
+
+
+class RecipeExportTests(TestCase):
+    """Tests for the streaming recipe export."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email="user@example.com",
+                                password="testpass123")
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(user=self.user, title="Curry")
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name="Thai"))
+        self.recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name="Rice"))
+        other_user = create_user(email="other@example.com",
+                                 password="testpass123")
+        create_recipe(user=other_user)
+
+    def test_export_ndjson(self):
+        """Test exporting recipes as newline delimited JSON."""
+        create_recipe(user=self.user, title="Soup")
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        recipes = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [recipe["title"] for recipe in recipes], ["Curry", "Soup"])
+        self.assertEqual(recipes[0]["tags"][0]["name"], "Thai")
+        self.assertEqual(recipes[0]["ingredients"][0]["name"], "Rice")
+
+    @patch.object(RecipeViewSet, "export_chunk_size", 2)
+    def test_export_pages_by_id(self):
+        """Test exports page through the library by id in chunks."""
+        recipes = [self.recipe] + [
+            create_recipe(user=self.user, title=f"Recipe {i}")
+            for i in range(4)
+        ]
+
+        res = self.client.get(EXPORT_URL)
+
+        lines = b"".join(res.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines],
+                         [recipe.id for recipe in recipes])
+
+    async def test_export_streams_under_asgi(self):
+        """Test ASGI requests get an async stream instead of a list."""
+        token = await Token.objects.acreate(user=self.user)
+
+        res = await self.async_client.get(
+            EXPORT_URL, headers={"authorization": f"Token {token.key}"})
+
+        self.assertTrue(res.is_async)
+        lines = b"".join([
+            chunk async for chunk in res.streaming_content
+        ]).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line)["title"] for line in lines], ["Curry"])
+
+    def test_export_csv(self):
+        """Test exporting recipes as CSV."""
+        res = self.client.get(EXPORT_URL, {"file_format": "csv"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        content = b"".join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["title"], "Curry")
+        self.assertEqual(rows[0]["tags"], "Thai")
+        self.assertEqual(rows[0]["price"], "2.99")
+
+    def test_export_invalid_format(self):
+        """Test unknown export formats are rejected."""
+        res = self.client.get(EXPORT_URL, {"file_format": "xml"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,172 @@
+"""
+Tests for the bulk recipe API.
+URLS:
+    - http://127.0.0.1/api/recipe/recipes/bulk/ Create - Update - Delete
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe.api.views import RecipeViewSet
+
+
+BULK_URL = reverse("recipe:recipe-bulk")
+
+
+def create_recipe(user, **kwargs):
+    """Create and return a sample recipe."""
+    defaults = {
+        "title": "Test Title",
+        "time_minutes": 5,
+        "price": Decimal("2.99"),
+    }
+    defaults.update(kwargs)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def recipe_payload(i):
+    """Return a recipe payload sharing tags with the others."""
+    return {
+        "title": f"Recipe {i}",
+        "time_minutes": 10 + i,
+        "price": "3.50",
+        "tags": [{"name": "Dinner"}, {"name": f"Tag {i}"}],
+        "ingredients": [{"name": "Salt"}, {"name": f"Ingredient {i}"}],
+    }
+
+
+class BulkRecipeAPITests(TestCase):
+    """Test bulk create, update and delete of recipes."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create(self):
+        """Test creating many recipes with shared tags in one request"""
+        payload = [recipe_payload(i) for i in range(20)]
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [recipe["title"] for recipe in res.data],
+            [item["title"] for item in payload],
+        )
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 20)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 21)
+        self.assertEqual(
+            Ingredient.objects.filter(user=self.user).count(), 21)
+        recipe = Recipe.objects.get(id=res.data[3]["id"])
+        self.assertEqual(
+            sorted(tag.name for tag in recipe.tags.all()),
+            ["Dinner", "Tag 3"],
+        )
+
+    def test_bulk_create_query_count(self):
+        """Test bulk create runs a constant number of queries"""
+        payload = [recipe_payload(i) for i in range(50)]
+
+        with self.assertNumQueries(15):
+            res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_bulk_create_invalid_item(self):
+        """Test an invalid item reports per item errors and writes nothing"""
+        payload = [recipe_payload(0), {"title": "Missing fields"}]
+
+        res = self.client.post(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn("time_minutes", res.data[1])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_update(self):
+        """Test partially updating many recipes"""
+        dessert = Tag.objects.create(user=self.user, name="Dessert")
+        r1 = create_recipe(user=self.user)
+        r1.tags.add(dessert)
+        r2 = create_recipe(user=self.user)
+        payload = [
+            {"id": r1.id, "title": "Pie", "tags": [{"name": "Dinner"}]},
+            {"id": r2.id, "price": "9.99"},
+        ]
+
+        res = self.client.patch(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        r1.refresh_from_db()
+        r2.refresh_from_db()
+        self.assertEqual(r1.title, "Pie")
+        self.assertEqual([tag.name for tag in r1.tags.all()], ["Dinner"])
+        self.assertEqual(r2.price, Decimal("9.99"))
+        self.assertEqual(r2.title, "Test Title")
+
+    def test_bulk_update_other_users_recipe(self):
+        """Test updating another user's recipe is rejected"""
+        other_user = get_user_model().objects.create_user(
+            "other@example.com", "testpass123")
+        recipe = create_recipe(user=other_user)
+
+        payload = [{"id": recipe.id, "title": "Stolen"}]
+        res = self.client.patch(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, "Test Title")
+
+    def test_bulk_delete(self):
+        """Test deleting many recipes limited to the user's own"""
+        other_user = get_user_model().objects.create_user(
+            "other@example.com", "testpass123")
+        r1 = create_recipe(user=self.user)
+        r2 = create_recipe(user=self.user)
+        other = create_recipe(user=other_user)
+
+        payload = {"ids": [r1.id, r2.id, other.id]}
+        res = self.client.delete(BULK_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["deleted"], 2)
+        self.assertFalse(Recipe.objects.filter(user=self.user).exists())
+        self.assertTrue(Recipe.objects.filter(id=other.id).exists())
+
+    def test_bulk_update_rejects_booleans(self):
+        """Test true is not taken as recipe id 1"""
+        recipe = create_recipe(user=self.user, id=1, title="Soup")
+
+        res = self.client.patch(
+            BULK_URL, [{"id": True, "title": "Stew"}], format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, "Soup")
+
+    def test_bulk_delete_rejects_booleans(self):
+        """Test true and false are not taken as recipe ids"""
+        recipe = create_recipe(user=self.user)
+
+        res = self.client.delete(
+            BULK_URL, {"ids": [True, recipe.id]}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
+
+    def test_bulk_delete_too_many_ids(self):
+        """Test deletes are capped like creates and updates"""
+        ids = list(range(1, RecipeViewSet.bulk_max_items + 2))
+
+        res = self.client.delete(BULK_URL, {"ids": ids}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,128 @@
+"""
+Query count regression tests for the recipe API.
+The number of queries must not depend on how many recipes,
+tags or ingredients are serialized.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse("recipe:recipe-detail", args=[recipe_id, ])
+
+
+def create_recipes(user, count, start=0):
+    """Create ``count`` recipes each linked to its own tag and ingredient."""
+    numbers = range(start, start + count)
+    recipes = Recipe.objects.bulk_create([
+        Recipe(
+            user=user,
+            title=f"Recipe {i}",
+            time_minutes=5,
+            price=Decimal("2.99"),
+        )
+        for i in numbers
+    ])
+    tags = Tag.objects.bulk_create([
+        Tag(user=user, name=f"Tag {i}") for i in numbers
+    ])
+    ingredients = Ingredient.objects.bulk_create([
+        Ingredient(user=user, name=f"Ingredient {i}") for i in numbers
+    ])
+    Recipe.tags.through.objects.bulk_create([
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+        for recipe, tag in zip(recipes, tags)
+    ])
+    Recipe.ingredients.through.objects.bulk_create([
+        Recipe.ingredients.through(
+            recipe_id=recipe.id, ingredient_id=ingredient.id)
+        for recipe, ingredient in zip(recipes, ingredients)
+    ])
+    return recipes
+
+
+class RecipeQueryCountTests(TestCase):
+    """Test the recipe endpoints run a constant number of queries."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "user@example.com",
+            "testpass123",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_list_query_count(self):
+        """Test listing recipes does not issue queries per recipe."""
+        created = 0
+        for size in [1, 100, 1000]:
+            create_recipes(self.user, size - created, start=created)
+            created = size
+
+            with self.assertNumQueries(4):
+                res = self.client.get(RECIPES_URL, {"page_size": 1000})
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(res.data["results"]), size)
+            self.assertEqual(len(res.data["results"][0]["tags"]), 1)
+            self.assertEqual(len(res.data["results"][0]["ingredients"]), 1)
+
+    def test_retrieve_query_count(self):
+        """Test retrieving a recipe with many tags runs constant queries."""
+        recipe = create_recipes(self.user, 1)[0]
+        tags = Tag.objects.bulk_create([
+            Tag(user=self.user, name=f"Extra {i}") for i in range(50)
+        ])
+        recipe.tags.add(*tags)
+
+        with self.assertNumQueries(4):
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["tags"]), 51)
+
+    def test_partial_update_query_count(self):
+        """Test the response of a write does not query per tag."""
+        recipe = create_recipes(self.user, 1)[0]
+        tags = Tag.objects.bulk_create([
+            Tag(user=self.user, name=f"Extra {i}") for i in range(50)
+        ])
+        recipe.tags.add(*tags)
+
+        with self.assertNumQueries(5):
+            res = self.client.patch(detail_url(recipe.id), {"title": "New"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["tags"]), 51)
+
+    def test_create_query_count_independent_of_ingredients(self):
+        """Test creating a recipe costs the same for 3 or 30 ingredients."""
+        Ingredient.objects.create(user=self.user, name="Ingredient 0")
+        for count in [3, 30]:
+            payload = {
+                "title": "Soup",
+                "time_minutes": 20,
+                "price": Decimal("4.50"),
+                "tags": [{"name": "Dinner"}, {"name": f"Tag {count}"}],
+                "ingredients": [
+                    {"name": f"Ingredient {i}"} for i in range(count)
+                ],
+            }
+
+            with self.assertNumQueries(12):
+                res = self.client.post(RECIPES_URL, payload, format="json")
+
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(len(res.data["ingredients"]), count)
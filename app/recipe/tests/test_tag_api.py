@@ -2,6 +2,8 @@
 Tests for the tags API.
 """
 
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import TestCase
@@ -9,7 +11,7 @@ from django.test import TestCase
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Tag
+from core.models import Tag, Recipe
 from recipe.api.serializers import TagSerializer
 
 TAGS_URL = reverse("recipe:tag-list")
@@ -58,7 +60,7 @@ class PrivateTagsAPITests(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_tags_limited_to_user(self):
         """Test list of tags is limited to authenticated users."""
@@ -69,9 +71,26 @@ class PrivateTagsAPITests(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]["name"], tag.name)
-        self.assertEqual(res.data[0]["id"], tag.id)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["name"], tag.name)
+        self.assertEqual(res.data["results"][0]["id"], tag.id)
+
+    def test_tags_paginated(self):
+        """Test tags are paginated by name with a cursor."""
+        for name in ["Breakfast", "Dinner", "Lunch"]:
+            Tag.objects.create(user=self.user, name=name)
+
+        res = self.client.get(TAGS_URL, {"page_size": 2})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [tag["name"] for tag in res.data["results"]]
+        self.assertEqual(names, ["Lunch", "Dinner"])
+
+        res = self.client.get(res.data["next"])
+
+        names = [tag["name"] for tag in res.data["results"]]
+        self.assertEqual(names, ["Breakfast"])
+        self.assertIsNone(res.data["next"])
 
     def test_update_tag(self):
         """Test updating a tag"""
@@ -87,6 +106,17 @@ class PrivateTagsAPITests(TestCase):
         tag.refresh_from_db()
         self.assertEqual(tag.name, payload["name"])
 
+    def test_update_tag_duplicate_name(self):
+        """Test renaming a tag to an existing name is rejected"""
+        Tag.objects.create(user=self.user, name="Vegan")
+        tag = Tag.objects.create(user=self.user, name="Dessert")
+
+        res = self.client.patch(detail_url(tag.id), {"name": "Vegan"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        tag.refresh_from_db()
+        self.assertEqual(tag.name, "Dessert")
+
     def test_delete_user_own_tag(self):
         """Test for user s own tag"""
         user = self.user
@@ -108,3 +138,39 @@ class PrivateTagsAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
         tags = Tag.objects.filter(user=user)
         self.assertTrue(tags.exists())
+
+    def test_filter_tags_assigned_to_recipes(self):
+        """Test listing tags by those assigned to recipes."""
+        tag1 = Tag.objects.create(user=self.user, name="Apples")
+        tag2 = Tag.objects.create(user=self.user, name="Turkey")
+        recipe = Recipe.objects.create(
+            title="Apple Crumble",
+            time_minutes=5,
+            price=Decimal("4.50"),
+            user=self.user,
+        )
+        recipe.tags.add(tag1)
+        other = Recipe.objects.create(
+            title="Apple Pie",
+            time_minutes=50,
+            price=Decimal("6.50"),
+            user=self.user,
+        )
+        other.tags.add(tag1)
+
+        res = self.client.get(TAGS_URL, {"assigned_only": 1})
+
+        names = [item["name"] for item in res.data["results"]]
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(names, [tag1.name])
+        self.assertNotIn(tag2.name, names)
+
+    def test_typeahead_limited_to_user(self):
+        """Test typeahead only suggests the user's own tags."""
+        other_user = create_user(email="other@example.com")
+        Tag.objects.create(user=other_user, name="Dinner party")
+        tag = Tag.objects.create(user=self.user, name="Dinner")
+
+        res = self.client.get(TAGS_URL, {"q": "din"})
+
+        self.assertEqual(res.data["results"], [{"id": tag.id, "name": "Dinner"}])
@@ -2,7 +2,7 @@
 URL Mapping for Recipes
 """
 from django.urls import path, include
-from recipe.api import views
+from recipe.api import views, async_views
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
@@ -14,4 +14,11 @@ app_name = "recipe"
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('async/recipes/', async_views.recipe_list,
+         name='async-recipe-list'),
+    path('async/recipes/<int:pk>/', async_views.recipe_detail,
+         name='async-recipe-detail'),
+    path('async/tags/', async_views.tag_list, name='async-tag-list'),
+    path('async/ingredients/', async_views.ingredient_list,
+         name='async-ingredient-list'),
 ]
@@ -0,0 +1,9 @@
+#!/bin/sh
+
+set -e
+
+python manage.py wait_for_db
+python manage.py collectstatic --noinput
+python manage.py migrate
+
+exec gunicorn --config gunicorn.conf.py "${APP_MODULE:-app.wsgi:application}"